@@ -1,144 +1,298 @@
 import heapq
-from collections import defaultdict
+import hashlib
 import itertools
-from generator import generateCNF, is_connected
+from array import array
+from cnf_cache import load_or_generate
+from generator import is_connected, connectivity_cuts, model_edges
+from connectivity import ConnectivityTracker
+from solver_stats import SolverStats, record_iteration
 import time
 
-def unit_propagation(clauses, assignment):
-    changed = True
-    while changed:
-        changed = False
-        unit_clauses = [c for c in clauses if len(c) == 1]  # Tìm mệnh đề đơn
-        if not unit_clauses:
-            break
-        for clause in unit_clauses:
-            literal = clause[0]
-            var = abs(literal)
-            value = literal > 0
-            if var in assignment:
-                if assignment[var] != value: # mâu thuẫn
-                    return False, clauses 
+# Trạng thái một nút A*: phép gán lưu bằng 2 số nguyên bitmask (assigned: biến
+# đã gán, truth: biến mang giá trị True), các MĐ chưa thỏa lưu bằng mảng chỉ số
+# vào bảng MĐ dùng chung (table), không sao chép MĐ.
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+# Duyệt các MĐ còn lại: bỏ MĐ đã đúng, trả về (MĐ còn sống, literal đơn vị).
+# Trả về (None, None) nếu có MĐ mà mọi literal đều sai.
+def scan_clauses(table, remaining, assigned, truth):
+    live = array('I')
+    units = []
+    for ci in remaining:
+        free = 0
+        free_count = 0
+        for lit in table[ci]:
+            bit = 1 << (lit if lit > 0 else -lit)
+            if assigned & bit:
+                if (truth & bit != 0) == (lit > 0):
+                    break
+            else:
+                free = lit
+                free_count += 1
+        else:
+            if free_count == 0:
+                return None, None
+            if free_count == 1:
+                units.append(free)
+            live.append(ci)
+    return live, units
+
+def pure_literal_elimination(table, live, assigned, truth):
+    polarity = {}
+    for ci in live:
+        for lit in table[ci]:
+            var = lit if lit > 0 else -lit
+            if assigned >> var & 1:
                 continue
-            assignment[var] = value
-            changed = True
-            new_clauses = []
-            #Làm đơn giản danh sách MĐ
-            for c in clauses:       
-                if literal in c:    #MĐ đúng, bỏ qua
-                    continue  
-                if -literal in c:   # Loại -lit khỏi MĐ
-                    reduced = [l for l in c if l != -literal]
-                    if not reduced:
-                        return False, clauses  
-                    new_clauses.append(reduced)
-                else:
-                    new_clauses.append(c) 
-            clauses = new_clauses
-    return True, clauses
-
-def pure_literal_elimination(clauses, assignment):
-    literal_count = defaultdict(int)
-    for clause in clauses:
-        for lit in clause:
-            literal_count[lit] += 1
-    assigned_vars = set(assignment.keys())
-    pure_literals = set()
-    # Tìm pure literal
-    for lit in literal_count:
-        if -lit not in literal_count and abs(lit) not in assigned_vars:
-            pure_literals.add(lit)
-    # Loại MĐ chứa pure literal
-    new_clauses = []
-    for clause in clauses:
-        if any(lit in pure_literals for lit in clause):
-            continue  
-        new_clauses.append(clause)
-    # Gán pure literal
-    for lit in pure_literals:
-        assignment[abs(lit)] = lit > 0
-    return new_clauses
-
-def heuristic(clauses, assignment, total_vars):
-    unassigned = total_vars - len(assignment)
-    clause_penalty = sum(1 for c in clauses if not any((abs(l) in assignment and assignment[abs(l)] == (l > 0)) for l in c))
-    return unassigned + clause_penalty
-
-
-def solve_cnf_astar(data):
-    clauses = data['cnf']
-    total_vars = max(abs(lit) for clause in clauses for lit in clause)
-    initial_assignment = {}
+            if polarity.get(var, lit) != lit:
+                polarity[var] = 0
+            else:
+                polarity[var] = lit
+    for var, lit in polarity.items():
+        if lit:
+            assigned |= 1 << var
+            if lit > 0:
+                truth |= 1 << var
+    return assigned, truth
+
+def unit_propagation(table, live, units, assigned, truth):
+    while units:
+        for lit in units:
+            var = lit if lit > 0 else -lit
+            bit = 1 << var
+            if assigned & bit:
+                if (truth & bit != 0) != (lit > 0):     # mâu thuẫn
+                    return None
+                continue
+            assigned |= bit
+            if lit > 0:
+                truth |= bit
+        live, units = scan_clauses(table, live, assigned, truth)
+        if live is None:
+            return None
+    return assigned, truth, live
+
+# Lan truyền ràng buộc: PL rồi UP, giống thứ tự cũ
+def simplify(table, remaining, assigned, truth):
+    live, units = scan_clauses(table, remaining, assigned, truth)
+    if live is None:
+        return None
+    pure_assigned, truth = pure_literal_elimination(table, live, assigned, truth)
+    if pure_assigned != assigned:
+        live, units = scan_clauses(table, live, pure_assigned, truth)
+    return unit_propagation(table, live, units, pure_assigned, truth)
+
+# Cấu trúc cầu dùng cho heuristic và chọn biến rẽ nhánh:
+#   var_info[var] = (đảo i, đảo j, số cầu var đóng góp cho mỗi đầu)
+#   incident[i]   = các biến cầu của đảo i
+#   deficit[i]    = số cầu đảo i còn thiếu khi chưa gán gì (đã trừ cầu cố định)
+# Với mã hóa ordered mỗi biến đúng góp 1 cầu, với pair v2 góp 2.
+def bridge_structure(data):
+    index = {island: i for i, island in enumerate(data['island_map'])}
+    ordered = data['encoding']['bridges'] == 'ordered'
+    deficit = list(data['island_map'].values())
+    labels = list(range(len(index)))
+    for x1, y1, x2, y2, w in data.get('fixed', ()):
+        i, j = index[(x1, y1)], index[(x2, y2)]
+        deficit[i] -= w
+        deficit[j] -= w
+        old, new = labels[j], labels[i]
+        labels = [new if label == old else label for label in labels]
+    var_info = {}
+    incident = [[] for _ in index]
+    for var, (x1, y1, x2, y2, w) in sorted(data['reverse_map'].items()):
+        i, j = index[(x1, y1)], index[(x2, y2)]
+        var_info[var] = (i, j, 1 if ordered else w)
+        incident[i].append(var)
+        incident[j].append(var)
+    return {
+        'var_info': var_info,
+        'incident': incident,
+        'deficit': deficit,
+        'mask': sum(1 << var for var in var_info),
+        'root': (sum(deficit), tuple(labels), len(set(labels))),
+    }
+
+# Ước lượng của nút con từ ước lượng (tổng số cầu còn thiếu, nhãn thành phần,
+# số thành phần) của nút cha: chỉ xét các biến cầu vừa thành True.
+def update_estimate(estimate, parent_truth, truth, structure):
+    new = truth & ~parent_truth & structure['mask']
+    if not new:
+        return estimate
+    deficit, labels, components = estimate
+    var_info = structure['var_info']
+    while new:
+        bit = new & -new
+        new ^= bit
+        i, j, weight = var_info[bit.bit_length() - 1]
+        deficit -= 2 * weight
+        old, label = labels[j], labels[i]
+        if old != label:
+            labels = tuple(label if k == old else k for k in labels)
+            components -= 1
+    return deficit, labels, components
+
+# h = tổng số cầu còn thiếu của mọi đảo + số thành phần liên thông phải nối thêm
+def heuristic(estimate):
+    deficit, _, components = estimate
+    return deficit + components - 1
+
+# Rẽ nhánh theo độ chặt: dư địa của một đảo còn thiếu cầu là số cầu các biến
+# tự do còn có thể thêm trừ số cầu thiếu. Chọn biến cầu tự do có đầu mút chặt
+# nhất, hòa thì biến nhỏ nhất (giữ thứ tự theo vị trí trên lưới). Không còn đảo
+# nào thiếu cầu thì lấy biến tự do nhỏ nhất (vd. biến phụ của CardEnc).
+def choose_branch(free, truth, structure):
+    var_info = structure['var_info']
+    deficit = structure['deficit']
+    slack = []
+    for i, variables in enumerate(structure['incident']):
+        need = deficit[i]
+        room = 0
+        for var in variables:
+            if truth >> var & 1:
+                need -= var_info[var][2]
+            elif free >> var & 1:
+                room += var_info[var][2]
+        slack.append(room - need if need > 0 and room else None)
+    best, best_key = None, None
+    for var, (i, j, _) in var_info.items():
+        if not free >> var & 1:
+            continue
+        tight = [slack[k] for k in (i, j) if slack[k] is not None]
+        if not tight:
+            continue
+        key = min(tight)
+        if best_key is None or key < best_key:
+            best, best_key = var, key
+    if best is not None:
+        return 1 << best
+    return free & -free
+
+# Khóa cho closed set: băm 8 byte của phép gán thay vì frozenset
+def state_key(assigned, truth, total_vars):
+    size = total_vars // 8 + 1
+    digest = hashlib.blake2b(assigned.to_bytes(size, 'little'), digest_size=8)
+    digest.update(truth.to_bytes(size, 'little'))
+    return digest.digest()
+
+# max_nodes giới hạn số nút trong heap và closed set. Khi vượt, heap chỉ giữ
+# một nửa số nút tốt nhất (tìm kiếm không còn đầy đủ) và closed set bị xóa,
+# thay vì để bộ nhớ tăng mãi.
+def solve_cnf_astar(data, max_nodes=None, stats=None, prune=True):
+    table = tuple(tuple(clause) for clause in data['cnf'])
+    total_vars = max((abs(lit) for clause in table for lit in clause), default=0)
+    full = (1 << (total_vars + 1)) - 2
+    # Loại nút mà các cầu còn có thể không nối được mọi đảo
+    tracker = ConnectivityTracker(data['edge_vars'], data['island_map'], data.get('fixed', ())) if prune else None
     # Xử lí trước bằng PL và UP
-    clauses = pure_literal_elimination(clauses, initial_assignment)
-    ok, clauses = unit_propagation(clauses, initial_assignment)
-    if not ok:
+    state = simplify(table, range(len(table)), 0, 0)
+    if state is None:
         return None
+    assigned, truth, live = state
+    if tracker is not None and not tracker.connected_without(assigned & ~truth):
+        return None
+    structure = bridge_structure(data)
 
     heap = []
     counter = itertools.count()
     g = 0
-    h = heuristic(clauses, initial_assignment, total_vars)
-    heapq.heappush(heap, (g + h, g, next(counter), initial_assignment, clauses))
+    estimate = update_estimate(structure['root'], 0, truth, structure)
+    heapq.heappush(heap, (g + heuristic(estimate), g, next(counter), assigned, truth, live, estimate))
     closed_set = set()
+    pruned = False
+    expanded = 0
+    propagated = 0
+    heap_peak = 1
 
-    while heap:
-        f, g, _, assignment, clauses = heapq.heappop(heap)
-        frozen = (frozenset(assignment.items()), len(assignment))
-        if frozen in closed_set:
-            continue
-        closed_set.add(frozen)
-
-        if not clauses:
-            return assignment
+    try:
+        while heap:
+            f, g, _, assigned, truth, live, estimate = heapq.heappop(heap)
+            key = state_key(assigned, truth, total_vars)
+            if key in closed_set:
+                continue
+            closed_set.add(key)
 
-        unassigned_vars = [v for v in range(1, total_vars + 1) if v not in assignment]
-        if not unassigned_vars:     # Gán tất cả biến nhưng chưa thỏa hết MĐ
-            continue
+            if not live:
+                return {var: truth >> var & 1 == 1 for var in range(1, total_vars + 1) if assigned >> var & 1}
 
-        # Expand
-        next_var = unassigned_vars[0]
-        for value in [True, False]:
-            new_assign = assignment.copy()
-            new_assign[next_var] = value
-            new_clauses = [clause[:] for clause in clauses]
-            lit = next_var if value else -next_var
-            new_clauses = [[l for l in c if l != -lit] for c in new_clauses if lit not in c]
-            
-            #Lan truyền ràng buộc
-            new_clauses = pure_literal_elimination(new_clauses, new_assign)
-            ok, new_clauses = unit_propagation(new_clauses, new_assign)
-            if not ok:
+            free = full & ~assigned
+            if not free:     # Gán tất cả biến nhưng chưa thỏa hết MĐ
                 continue
 
-            h = heuristic(new_clauses, new_assign, total_vars)
-            heapq.heappush(heap, (g + 1 + h, g + 1, next(counter), new_assign, new_clauses))
+            # Expand
+            expanded += 1
+            bit = choose_branch(free, truth, structure)
+            base = popcount(assigned) + 1
+            for value in [True, False]:
+                state = simplify(table, live, assigned | bit, truth | bit if value else truth)
+                if state is None:
+                    continue
+                propagated += popcount(state[0]) - base
+                if tracker is not None:
+                    false_mask = state[0] & ~state[1]
+                    if false_mask & ~(assigned & ~truth) & tracker.bridge_mask and \
+                            not tracker.connected_without(false_mask):
+                        continue
+                child = update_estimate(estimate, truth, state[1], structure)
+                heapq.heappush(heap, (g + 1 + heuristic(child), g + 1, next(counter)) + state + (child,))
+            heap_peak = max(heap_peak, len(heap))
 
-    return None
-
-def solve_astar(grid):
-    if not grid or not grid[0]:
-        print("Empty or invalid grid.")
+            if max_nodes is not None:
+                if len(heap) > max_nodes:
+                    heap = heapq.nsmallest(max_nodes // 2, heap)
+                    pruned = True
+                if len(closed_set) > max_nodes:
+                    closed_set.clear()
         return None
-    start_time = time.perf_counter()
-    data = generateCNF(grid)
+    finally:
+        if stats is not None:
+            stats['nodes_expanded'] = stats.get('nodes_expanded', 0) + expanded
+            stats['propagations'] = stats.get('propagations', 0) + propagated
+            stats['heap_peak'] = max(stats.get('heap_peak', 0), heap_peak)
+            stats['pruned'] = stats.get('pruned', False) or pruned
+
+def solve_connected_astar(data, mode='cut', stats=None, max_nodes=None, prune=True):
     while True:
-        assignment = solve_cnf_astar(data)
-        if not assignment:
+        iteration_start = time.perf_counter()
+        assignment = solve_cnf_astar(data, max_nodes, stats, prune)
+        elapsed = time.perf_counter() - iteration_start
+        if assignment is None:
+            record_iteration(stats, elapsed, satisfiable=False)
             return None
 
-        active_edges = []
-        blocking_clause = []
-        for var, val in assignment.items():
-            if val and var in data['reverse_map']:
-                edge = data['reverse_map'][var]
-                active_edges.append(edge)
-                blocking_clause.append(-var)
+        true_vars = [var for var, val in assignment.items() if val and var in data['reverse_map']]
+        active_edges = model_edges(true_vars, data)
+        blocking_clause = [-var for var in true_vars]
 
         if is_connected(active_edges, data['island_map']):
-            end_time = time.perf_counter()
-            elapsed = end_time - start_time
-            print(f"[A*] Solved in {elapsed:.4f} seconds")
+            record_iteration(stats, elapsed, satisfiable=True, connected=True)
             return active_edges
 
-        data['cnf'].append(blocking_clause)
-        
\ No newline at end of file
+        if mode == 'cut':
+            cuts = connectivity_cuts(active_edges, data['edge_vars'], data['island_map'])
+            record_iteration(stats, elapsed, satisfiable=True, connected=False, cuts=len(cuts))
+            if any(not cut for cut in cuts):
+                return None
+            data['cnf'].extend(cuts)
+        else:
+            record_iteration(stats, elapsed, satisfiable=True, connected=False, cuts=0)
+            data['cnf'].append(blocking_clause)
+
+def solve_astar(grid, mode='cut', max_nodes=None, stats=None, verbose=True, return_stats=False):
+    stats = stats if stats is not None else SolverStats('astar')
+    if not grid or not grid[0]:
+        if verbose:
+            print("Empty or invalid grid.")
+        return (None, stats) if return_stats else None
+    data = load_or_generate(grid)
+    stats.set_cnf(data)
+    start_time = time.perf_counter()
+    solution = solve_connected_astar(data, mode, stats, max_nodes)
+    stats.finish(time.perf_counter() - start_time)
+    if verbose and solution is not None:
+        print(f"[A*] Solved in {stats.total_time():.4f} seconds")
+    elif verbose and stats.get('pruned'):
+        print(f"[A*] Node limit of {max_nodes} reached, search was incomplete")
+    return (solution, stats) if return_stats else solution
@@ -1,125 +1,553 @@
-from generator import generateCNF, is_connected
-import copy
+import heapq
+from cnf_cache import load_or_generate
+from generator import is_connected, connectivity_cuts, model_edges
+from connectivity import ConnectivityTracker
+from solver_stats import SolverStats, record_iteration
 import time
 
-def unit_propagate(clauses, assignment):
-    changed = True
-    new_assignment = assignment.copy()
-    new_clauses = copy.deepcopy(clauses)
-
-    while changed:
-        changed = False
-        updated_clauses = []
-        for clause in new_clauses:
-            unassigned_lits = []
-            satisfied = False
-            for lit in clause:
-                var = abs(lit)
-                if var in new_assignment:
-                    if (lit > 0 and new_assignment[var]) or (
-                        lit < 0 and not new_assignment[var]
-                    ):
-                        satisfied = True
-                        break
-                else:
-                    unassigned_lits.append(lit)
-            if satisfied:
+# Lan truyền đơn vị bằng 2 literal canh (watched literals).
+# value[var]: 1 = True, -1 = False, 0 = chưa gán. Các literal được gán nối vào
+# trail; propagate xử lý trail từ vị trí qhead. Mỗi mệnh đề luôn canh 2 literal
+# đầu tiên c[0], c[1]. Trả về False nếu gặp xung đột.
+def propagate(clauses, watches, value, trail, qhead):
+    while qhead < len(trail):
+        false_lit = -trail[qhead]
+        qhead += 1
+        watching = watches[false_lit]
+        i = 0
+        while i < len(watching):
+            c = clauses[watching[i]]
+            if c[0] == false_lit:
+                c[0], c[1] = c[1], c[0]
+            first = c[0]
+            if value[abs(first)] * (1 if first > 0 else -1) == 1:    # MĐ đã đúng
+                i += 1
                 continue
-            if not unassigned_lits:
-                return None, None  # Xung đột
-            if len(unassigned_lits) == 1:
-                unit_lit = unassigned_lits[0]
-                var = abs(unit_lit)
-                val = unit_lit > 0
-                if var in new_assignment and new_assignment[var] != val:
-                    return None, None  # Xung đột
-                if var not in new_assignment:
-                    new_assignment[var] = val
-                    changed = True
-            updated_clauses.append(unassigned_lits)
-        new_clauses = updated_clauses
-    return new_clauses, new_assignment
-
-
-def dpll(clauses, assignment):
-    new_clauses, new_assignment = unit_propagate(clauses, assignment)
-    if new_clauses is None:
+            # Tìm literal canh mới không sai
+            for k in range(2, len(c)):
+                lit = c[k]
+                if value[abs(lit)] * (1 if lit > 0 else -1) != -1:
+                    c[1], c[k] = lit, false_lit
+                    watches[lit].append(watching[i])
+                    watching[i] = watching[-1]
+                    watching.pop()
+                    break
+            else:
+                if value[abs(first)] != 0:      # Cả 2 literal canh đều sai
+                    return False, qhead
+                value[abs(first)] = 1 if first > 0 else -1
+                trail.append(first)
+                i += 1
+    return True, qhead
+
+
+# DPLL lặp: một trail duy nhất, quay lui bằng cách hoàn tác trail tới mức quyết định.
+# Nếu có tracker (ConnectivityTracker), phép gán bộ phận bị loại ngay khi các
+# cầu còn có thể không nối được mọi đảo.
+def dpll(clauses, assignment, tracker=None, stats=None):
+    num_vars = max((abs(lit) for clause in clauses for lit in clause), default=0)
+    num_vars = max([num_vars] + list(assignment))
+    value = [0] * (num_vars + 1)
+    trail = []
+    watches = {lit: [] for v in range(1, num_vars + 1) for lit in (v, -v)}
+
+    def assign(lit):
+        current = value[abs(lit)] * (1 if lit > 0 else -1)
+        if current == 0:
+            value[abs(lit)] = 1 if lit > 0 else -1
+            trail.append(lit)
+        return current != -1
+
+    for var, val in assignment.items():
+        assign(var if val else -var)
+
+    watched = []
+    units = []
+    for clause in clauses:
+        lits = list(dict.fromkeys(clause))
+        if any(-lit in lits for lit in lits):   # Luôn đúng
+            continue
+        if not lits:
+            return None
+        if len(lits) == 1:
+            units.append(lits[0])
+            continue
+        watches[lits[0]].append(len(watched))
+        watches[lits[1]].append(len(watched))
+        watched.append(lits)
+    for lit in units:
+        if not assign(lit):
+            return None
+
+    fed = 0     # Số literal trên trail đã đưa vào tracker
+
+    def connected():
+        nonlocal fed
+        if tracker is None:
+            return True
+        for lit in trail[fed:]:
+            tracker.assign(lit)
+        fed = len(trail)
+        return tracker.feasible()
+
+    qhead = 0
+    propagation_count = 0
+
+    def run_propagate():
+        nonlocal qhead, propagation_count
+        start = len(trail)
+        ok, qhead = propagate(watched, watches, value, trail, qhead)
+        propagation_count += len(trail) - start
+        return ok and connected()
+
+    if not run_propagate():
         return None
 
-    literal_polarity = {}
-    for clause in new_clauses:
-        for lit in clause:
+    decisions = []      # (vị trí trên trail, literal quyết định, đã thử cả 2 giá trị, mốc tracker)
+    next_var = 1
+    decision_count = 0
+    try:
+        while True:
+            while next_var <= num_vars and value[next_var] != 0:
+                next_var += 1
+            if next_var > num_vars:
+                return {var: value[var] == 1 for var in range(1, num_vars + 1)}
+
+            lit = next_var
+            decision_count += 1
+            decisions.append((len(trail), lit, False, tracker.mark() if tracker else None))
+            value[lit] = 1
+            trail.append(lit)
+            ok = run_propagate()
+            while not ok:
+                # Quay lui tới quyết định gần nhất chưa thử giá trị còn lại
+                while decisions and decisions[-1][2]:
+                    decisions.pop()
+                if not decisions:
+                    return None
+                level_start, lit, _, mark = decisions.pop()
+                for undone in trail[level_start:]:
+                    value[abs(undone)] = 0
+                del trail[level_start:]
+                qhead = level_start
+                if tracker is not None:
+                    tracker.undo(mark)
+                    fed = level_start
+                next_var = abs(lit)
+                decisions.append((level_start, -lit, True, mark))
+                value[abs(lit)] = -1 if lit > 0 else 1
+                trail.append(-lit)
+                ok = run_propagate()
+    finally:
+        if stats is not None:
+            stats['decisions'] = stats.get('decisions', 0) + decision_count
+            stats['propagations'] = stats.get('propagations', 0) + propagation_count
+
+
+# Dãy Luby 1, 1, 2, 1, 1, 2, 4, ... (x bắt đầu từ 0)
+def luby(x):
+    size, seq = 1, 0
+    while size < x + 1:
+        seq += 1
+        size = 2 * size + 1
+    while size - 1 != x:
+        size = (size - 1) >> 1
+        seq -= 1
+        x = x % size
+    return 1 << seq
+
+# CDCL: phân tích xung đột 1-UIP, học mệnh đề, quay lui không theo thứ tự
+# (backjump), chọn biến theo hoạt động (VSIDS) kèm lưu pha, khởi động lại theo
+# dãy Luby. Đối tượng được giữ qua các lần giải lại vì chưa liên thông nên mệnh
+# đề đã học vẫn còn: add_clause chỉ thêm ràng buộc, mọi mệnh đề học được vẫn
+# suy ra được từ CNF mới.
+# Khi có tracker, xung đột liên thông được giải thích bằng mệnh đề lát cắt
+# (ConnectivityTracker.cut_clause) và học như mọi xung đột khác; mặc định
+# solve_cnf_cdcl không dùng tracker vì kiểm tra sau mỗi lần lan truyền tốn hơn
+# phần tìm kiếm tiết kiệm được, liên thông được bảo đảm bằng lát cắt như pysat.
+# Giống propagate ở trên, literal c[0] của mệnh đề lý do là literal được suy ra.
+class CDCLSolver:
+    def __init__(self, tracker=None, restart_base=100, decay=0.95):
+        self.tracker = tracker
+        self.restart_base = restart_base
+        self.decay = decay
+        self.clauses = []
+        self.learned = []           # Chỉ số các mệnh đề học được trong clauses
+        self.lbd = {}               # Chỉ số mệnh đề học -> số mức quyết định khác nhau (LBD)
+        self.watches = {}
+        self.value = [0]
+        self.level = [0]
+        self.reason = [None]
+        self.phase = [1]            # Pha đã lưu, mặc định True (nhanh hơn False trên bảng sinh ngẫu nhiên)
+        self.activity = [0.0]
+        self.seen = bytearray(1)
+        self.order = []             # Heap (-activity, var), xóa lười
+        self.increment = 1.0
+        self.trail = []
+        self.trail_lim = []         # Vị trí trên trail bắt đầu mỗi mức quyết định
+        self.marks = []             # Mốc tracker ứng với mỗi mức
+        self.qhead = 0
+        self.fed = 0                # Số literal trên trail đã đưa vào tracker
+        self.unsat = False
+        self.max_learned = 2000
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+        self.restarts = 0
+
+    def ensure_var(self, var):
+        while len(self.value) <= var:
+            v = len(self.value)
+            self.value.append(0)
+            self.level.append(0)
+            self.reason.append(None)
+            self.phase.append(1)
+            self.activity.append(0.0)
+            self.seen.append(0)
+            self.watches[v] = []
+            self.watches[-v] = []
+            heapq.heappush(self.order, (0.0, v))
+
+    def lit_value(self, lit):
+        return self.value[abs(lit)] * (1 if lit > 0 else -1)
+
+    def assign(self, lit, reason):
+        var = abs(lit)
+        self.value[var] = 1 if lit > 0 else -1
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(lit)
+
+    # Thêm mệnh đề ở mức 0 (giữa các lần solve). Trả về False nếu CNF vô nghiệm.
+    def add_clause(self, clause):
+        if self.unsat:
+            return False
+        self.backtrack(0)
+        lits = list(dict.fromkeys(clause))
+        for lit in lits:
+            self.ensure_var(abs(lit))
+        if any(-lit in lits for lit in lits) or any(self.lit_value(lit) == 1 for lit in lits):
+            return True
+        lits = [lit for lit in lits if self.lit_value(lit) == 0]
+        if not lits:
+            self.unsat = True
+            return False
+        if len(lits) == 1:
+            self.assign(lits[0], None)
+            return True
+        self.attach(lits)
+        return True
+
+    def attach(self, lits):
+        index = len(self.clauses)
+        self.clauses.append(lits)
+        self.watches[lits[0]].append(index)
+        self.watches[lits[1]].append(index)
+        return index
+
+    # Lan truyền 2 literal canh từ qhead, trả về chỉ số mệnh đề xung đột hoặc None
+    def propagate(self):
+        clauses, watches, value, trail = self.clauses, self.watches, self.value, self.trail
+        start = len(trail)
+        conflict = None
+        while self.qhead < len(trail) and conflict is None:
+            false_lit = -trail[self.qhead]
+            self.qhead += 1
+            watching = watches[false_lit]
+            i = 0
+            while i < len(watching):
+                index = watching[i]
+                c = clauses[index]
+                if c[0] == false_lit:
+                    c[0], c[1] = c[1], c[0]
+                first = c[0]
+                if value[abs(first)] * (1 if first > 0 else -1) == 1:
+                    i += 1
+                    continue
+                for k in range(2, len(c)):
+                    lit = c[k]
+                    if value[abs(lit)] * (1 if lit > 0 else -1) != -1:
+                        c[1], c[k] = lit, false_lit
+                        watches[lit].append(index)
+                        watching[i] = watching[-1]
+                        watching.pop()
+                        break
+                else:
+                    if value[abs(first)] != 0:
+                        conflict = index
+                        break
+                    self.assign(first, index)
+                    i += 1
+        self.propagations += len(trail) - start
+        if conflict is None and self.tracker is not None:
+            return self.check_connectivity()
+        return conflict
+
+    # Đưa các literal mới vào tracker; nếu các cầu còn có thể không nối được mọi
+    # đảo thì thêm mệnh đề lát cắt (đang sai hết) và trả về nó làm xung đột
+    def check_connectivity(self):
+        tracker = self.tracker
+        for lit in self.trail[self.fed:]:
+            tracker.assign(lit)
+        self.fed = len(self.trail)
+        if tracker.feasible():
+            return None
+        lits = sorted(dict.fromkeys(tracker.cut_clause()), key=lambda lit: -self.level[abs(lit)])
+        if len(lits) < 2 or self.level[abs(lits[0])] == 0:
+            return -1       # Không thể liên thông dù gán lại các quyết định
+        # Phân tích cần ít nhất một literal ở mức hiện tại
+        self.backtrack(self.level[abs(lits[0])])
+        index = self.attach(lits)
+        self.learned.append(index)
+        self.lbd[index] = len({self.level[abs(lit)] for lit in lits})
+        return index
+
+    def bump(self, var):
+        self.activity[var] += self.increment
+        if self.activity[var] > 1e100:
+            for v in range(1, len(self.activity)):
+                self.activity[v] *= 1e-100
+            self.increment *= 1e-100
+            self.order = [(-self.activity[v], v) for v in range(1, len(self.value)) if self.value[v] == 0]
+            heapq.heapify(self.order)
+        elif self.value[var] == 0:
+            heapq.heappush(self.order, (-self.activity[var], var))
+
+    # Phân tích 1-UIP: trả về (mệnh đề học, mức quay lui); literal đầu là literal khẳng định
+    def analyze(self, conflict):
+        seen, level, reason, trail = self.seen, self.level, self.reason, self.trail
+        current = len(self.trail_lim)
+        learnt = [0]
+        counter = 0
+        clause = self.clauses[conflict]
+        index = len(trail) - 1
+        p = None
+        while True:
+            for lit in (clause if p is None else clause[1:]):
+                var = abs(lit)
+                if not seen[var] and level[var] > 0:
+                    seen[var] = 1
+                    self.bump(var)
+                    if level[var] >= current:
+                        counter += 1
+                    else:
+                        learnt.append(lit)
+            while not seen[abs(trail[index])]:
+                index -= 1
+            p = trail[index]
+            index -= 1
+            seen[abs(p)] = 0
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.clauses[reason[abs(p)]]
+        learnt[0] = -p
+        for lit in learnt[1:]:
+            seen[abs(lit)] = 0
+        if len(learnt) == 1:
+            return learnt, 0
+        # Literal có mức cao nhất (ngoài literal khẳng định) làm literal canh thứ 2
+        best = max(range(1, len(learnt)), key=lambda k: level[abs(learnt[k])])
+        learnt[1], learnt[best] = learnt[best], learnt[1]
+        return learnt, level[abs(learnt[1])]
+
+    def backtrack(self, target):
+        if len(self.trail_lim) <= target:
+            return
+        start = self.trail_lim[target]
+        for lit in self.trail[start:]:
             var = abs(lit)
-            if var in new_assignment:
+            self.phase[var] = self.value[var]
+            self.value[var] = 0
+            self.reason[var] = None
+            heapq.heappush(self.order, (-self.activity[var], var))
+        if len(self.order) > 4 * len(self.value):    # Dọn các mục cũ của heap
+            self.order = list({var: (-self.activity[var], var) for _, var in self.order
+                               if self.value[var] == 0}.values())
+            heapq.heapify(self.order)
+        del self.trail[start:]
+        self.qhead = start
+        if self.tracker is not None:
+            self.tracker.undo(self.marks[target])
+            self.fed = min(self.fed, start)
+            del self.marks[target:]
+        del self.trail_lim[target:]
+
+    def pick_branch(self):
+        order, value, activity = self.order, self.value, self.activity
+        while order:
+            neg_activity, var = heapq.heappop(order)
+            if value[var] == 0 and -neg_activity == activity[var]:
+                return var if self.phase[var] > 0 else -var
+        # Heap có thể lỡ các biến mà mục của chúng đã cũ: tìm tuần tự
+        for var in range(1, len(value)):
+            if value[var] == 0:
+                return var if self.phase[var] > 0 else -var
+        return None
+
+    # Bỏ một nửa số mệnh đề học kém nhất (LBD lớn, dài). Chỉ chạy ở mức 0 nên
+    # không mệnh đề nào đang là lý do; watch được dựng lại từ đầu.
+    def reduce_learned(self):
+        keep = set(range(len(self.clauses))) - set(self.learned)
+        ranked = sorted(self.learned, key=lambda i: (self.lbd[i], len(self.clauses[i])))
+        half = len(ranked) // 2
+        keep.update(i for k, i in enumerate(ranked) if k < half or self.lbd[i] <= 2)
+        old_clauses, old_lbd = self.clauses, self.lbd
+        self.clauses, self.learned, self.lbd = [], [], {}
+        for lits in self.watches.values():
+            lits.clear()
+        for i in sorted(keep):
+            index = self.attach(old_clauses[i])
+            if i in old_lbd:
+                self.learned.append(index)
+                self.lbd[index] = old_lbd[i]
+        for var in range(1, len(self.reason)):
+            self.reason[var] = None
+        self.max_learned = int(self.max_learned * 1.1)
+
+    def model(self):
+        return {var: self.value[var] == 1 for var in range(1, len(self.value))}
+
+    # Trả về mô hình {var: bool} hoặc None nếu vô nghiệm
+    def solve(self):
+        if self.unsat:
+            return None
+        self.backtrack(0)
+        restart = 0
+        budget = self.restart_base * luby(restart)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                budget -= 1
+                if not self.trail_lim or conflict == -1:
+                    self.unsat = True
+                    return None
+                learnt, target = self.analyze(conflict)
+                self.backtrack(target)
+                if len(learnt) == 1:
+                    self.assign(learnt[0], None)
+                else:
+                    index = self.attach(learnt)
+                    self.learned.append(index)
+                    self.lbd[index] = len({self.level[abs(lit)] for lit in learnt})
+                    self.assign(learnt[0], index)
+                self.increment /= self.decay
+                continue
+            if budget <= 0:
+                self.restarts += 1
+                restart += 1
+                budget = self.restart_base * luby(restart)
+                self.backtrack(0)
+                if len(self.learned) > self.max_learned:
+                    self.reduce_learned()
                 continue
-            if var not in literal_polarity:
-                literal_polarity[var] = lit > 0
-            elif literal_polarity[var] != (lit > 0):
-                literal_polarity[var] = None
-
-    for var, val in literal_polarity.items():
-        if val is not None and var not in new_assignment:
-            new_assignment[var] = val
-
-    all_satisfied = all(
-        any((lit > 0 and new_assignment.get(abs(lit), False)) or
-            (lit < 0 and not new_assignment.get(abs(lit), False))
-            for lit in clause)
-        for clause in new_clauses
-    )
-    if all_satisfied:
-        return new_assignment
-
-    all_vars = set(abs(lit) for clause in new_clauses for lit in clause)
-    unassigned = list(all_vars - set(new_assignment.keys()))
-    if not unassigned:
-        return new_assignment
-
-    var = min(unassigned)
-    for val in [True, False]:
-        trial = new_assignment.copy()
-        trial[var] = val
-        result = dpll(new_clauses, trial)
-        if result is not None:
-            return result
-    return None
-
-
-def solve_cnf_backtracking(data):
-    clauses = data['cnf']
-    reverse_map = data['reverse_map']
+            lit = self.pick_branch()
+            if lit is None:
+                return self.model()
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            if self.tracker is not None:
+                self.marks.append(self.tracker.mark())
+            self.assign(lit, None)
+
+# prune=None: dpll dùng ConnectivityTracker, cdcl thì không (xem CDCLSolver)
+def solve_cnf_backtracking(data, mode='cut', stats=None, prune=None, engine='dpll'):
+    if engine == 'cdcl':
+        return solve_cnf_cdcl(data, mode, stats, bool(prune))
+    if prune is None:
+        prune = True
+    clauses = data['cnf'].to_lists()     # dpll truy cập mệnh đề theo chỉ số
     island_map = data['island_map']
 
     all_vars = sorted(set(abs(lit) for clause in clauses for lit in clause))
 
     while True:
-        model = dpll(clauses, {})
+        iteration_start = time.perf_counter()
+        tracker = ConnectivityTracker(data['edge_vars'], island_map, data.get('fixed', ())) if prune else None
+        model = dpll(clauses, {}, tracker, stats)
+        elapsed = time.perf_counter() - iteration_start
         if model is None:
+            record_iteration(stats, elapsed, satisfiable=False)
             return None
 
-        active_edges = []
-        for var in all_vars:
-            if model.get(var, False) and var in reverse_map:
-                active_edges.append(reverse_map[var])
+        active_edges = model_edges([var for var in all_vars if model.get(var, False)], data)
 
         if is_connected(active_edges, island_map):
+            record_iteration(stats, elapsed, satisfiable=True, connected=True)
             return active_edges
+        elif mode == 'cut':
+            cuts = connectivity_cuts(active_edges, data['edge_vars'], island_map)
+            record_iteration(stats, elapsed, satisfiable=True, connected=False, cuts=len(cuts))
+            if any(not cut for cut in cuts):
+                return None
+            clauses.extend(cuts)
         else:
+            record_iteration(stats, elapsed, satisfiable=True, connected=False, cuts=0)
             blocking_clause = [-var if model.get(var, False) else var for var in all_vars]
             clauses.append(blocking_clause)
 
-def solve_backtracking(grid):
+# Cùng vòng giải lại như trên nhưng dùng một CDCLSolver cho mọi lần lặp: lát
+# cắt / mệnh đề chặn được thêm vào solver, mệnh đề đã học được giữ lại.
+def solve_cnf_cdcl(data, mode='cut', stats=None, prune=False):
+    island_map = data['island_map']
+    tracker = ConnectivityTracker(data['edge_vars'], island_map, data.get('fixed', ())) if prune else None
+    solver = CDCLSolver(tracker)
+    for clause in data['cnf']:
+        solver.add_clause(clause)
+    all_vars = sorted(data['reverse_map'])
+    counted = {'decisions': 0, 'propagations': 0, 'conflicts': 0, 'restarts': 0}
+
+    def update_stats():
+        if stats is None:
+            return
+        for key in counted:
+            value = getattr(solver, key)
+            stats[key] = stats.get(key, 0) + value - counted[key]
+            counted[key] = value
+        stats['learned_clauses'] = len(solver.learned)
+
+    while True:
+        iteration_start = time.perf_counter()
+        model = solver.solve()
+        elapsed = time.perf_counter() - iteration_start
+        update_stats()
+        if model is None:
+            record_iteration(stats, elapsed, satisfiable=False)
+            return None
+
+        active_edges = model_edges([var for var in all_vars if model.get(var, False)], data)
+
+        if is_connected(active_edges, island_map):
+            record_iteration(stats, elapsed, satisfiable=True, connected=True)
+            return active_edges
+        elif mode == 'cut':
+            cuts = connectivity_cuts(active_edges, data['edge_vars'], island_map)
+            record_iteration(stats, elapsed, satisfiable=True, connected=False, cuts=len(cuts))
+            if any(not cut for cut in cuts):
+                return None
+            for cut in cuts:
+                solver.add_clause(cut)
+        else:
+            record_iteration(stats, elapsed, satisfiable=True, connected=False, cuts=0)
+            solver.add_clause([-var if model.get(var, False) else var for var in all_vars])
+
+# engine='cdcl' dùng CDCLSolver thay cho dpll
+def solve_backtracking(grid, mode='cut', stats=None, verbose=True, engine='dpll', return_stats=False):
+    stats = stats if stats is not None else SolverStats('cdcl' if engine == 'cdcl' else 'backtracking')
     if not grid or not grid[0]:
-        print("Empty or invalid grid.")
-        return None
-    
+        if verbose:
+            print("Empty or invalid grid.")
+        return (None, stats) if return_stats else None
+    data = load_or_generate(grid)
+    stats.set_cnf(data)
     start_time = time.perf_counter()
+    solution = solve_cnf_backtracking(data, mode, stats, engine=engine)
+    stats.finish(time.perf_counter() - start_time)
+    if verbose:
+        print(f"[{'CDCL' if engine == 'cdcl' else 'Backtracking'}] Solved in {stats.total_time():.4f} seconds")
 
-    data = generateCNF(grid)
-    solution = solve_cnf_backtracking(data)
-
-    end_time = time.perf_counter()
-    elapsed = end_time - start_time
-    print(f"[Backtracking] Solved in {elapsed:.4f} seconds")
+    return (solution, stats) if return_stats else solution
 
-    return solution
+def solve_cdcl(grid, mode='cut', stats=None, verbose=True, return_stats=False):
+    return solve_backtracking(grid, mode, stats, verbose, engine='cdcl', return_stats=return_stats)
@@ -0,0 +1,232 @@
+import contextlib
+import glob
+import importlib
+import io
+import json
+import multiprocessing as mp
+import os
+import time
+from multiprocessing.connection import wait
+from solver_stats import SolverStats
+
+# Tên solver -> (module, hàm)
+SOLVERS = {
+    'pysat': ('pySAT_solver', 'solve_pysat'),
+    'bruteforce': ('brute_force_solver', 'solve_bruteforce'),
+    'backtracking': ('backtracking_solver', 'solve_backtracking'),
+    'cdcl': ('backtracking_solver', 'solve_cdcl'),
+    'astar': ('astar_solver', 'solve_astar'),
+    'hashi': ('hashi_solver', 'solve_hashi'),
+    'portfolio': ('portfolio', 'solve_portfolio'),
+}
+
+def load_solver(name):
+    module_name, func_name = SOLVERS[name]
+    return getattr(importlib.import_module(module_name), func_name)
+
+def collect_inputs(pattern):
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.txt')
+    return sorted(p for p in glob.glob(pattern) if os.path.isfile(p))
+
+def output_path(input_file, output_dir):
+    name = os.path.basename(input_file)
+    if 'input' in name:
+        name = name.replace('input', 'output', 1)
+    return os.path.join(output_dir, name)
+
+# Bản sao gọn của SolverStats để gửi qua tiến trình / ghi JSON
+def export_stats(stats):
+    return {key: value for key, value in stats.items() if key not in ('solver', 'iteration_times')}
+
+# Giải một lưới, không in gì; thống kê của solver nằm trong result['stats']
+def solve_grid(grid, solver_name):
+    from cnf_cache import default_cache
+    cache = default_cache()
+    hits = cache.hits if cache else 0
+    start_time = time.perf_counter()
+    if not grid or not grid[0]:
+        status, edges, stats = 'invalid', None, SolverStats(solver_name)
+    else:
+        edges, stats = load_solver(solver_name)(grid, verbose=False, return_stats=True)
+        status = 'solved' if edges is not None else 'unsolved'
+    result = {'status': status, 'solve_time': round(time.perf_counter() - start_time, 6), 'edges': edges,
+              'stats': export_stats(stats)}
+    if cache and solver_name not in ('hashi', 'portfolio'):
+        result['cnf_cache'] = 'hit' if cache.hits > hits else 'miss'
+    return result
+
+def solve_file(input_file, output_file, solver_name):
+    from main import read_input, write_solution
+    with contextlib.redirect_stdout(io.StringIO()):
+        grid = read_input(input_file)
+    result = solve_grid(grid, solver_name)
+    edges = result.pop('edges')
+    if edges is not None:
+        write_solution(grid, edges, output_file)
+    else:
+        with open(output_file, 'w') as f:
+            f.write("Invalid or empty input.\n" if result['status'] == 'invalid' else "No solution found\n")
+    return result
+
+def _serve_tasks(conn):
+    # Worker sinh sau giữ bản sao đầu Pipe của worker trước nên EOF không đủ để
+    # biết tiến trình cha đã chết; theo dõi thêm tiến trình cha
+    parent = mp.parent_process()
+    while True:
+        if conn not in wait([conn, parent.sentinel]):
+            break
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        target, args = task
+        try:
+            result = target(*args)
+        except Exception as e:
+            result = {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+        conn.send(result)
+    conn.close()
+
+# Một tiến trình worker sống suốt run_pool, nhận lần lượt nhiều task qua Pipe nên
+# solver (pysat, numpy, ...) chỉ được import một lần cho mỗi worker
+class _PoolWorker:
+    def __init__(self):
+        self.conn, child_conn = mp.Pipe()
+        self.proc = mp.Process(target=_serve_tasks, args=(child_conn,))
+        self.proc.start()
+        child_conn.close()
+
+    def stop(self, kill=False):
+        if kill:
+            self.proc.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+        self.proc.join()
+        self.conn.close()
+
+# Chạy target(*args) cho từng task trên tối đa workers tiến trình sống lâu, mỗi
+# task có giới hạn thời gian. tasks là iterable (key, args), chỉ được lấy dần khi
+# có worker rảnh; yield (key, record) ngay khi từng task xong (không theo thứ tự
+# đầu vào). Task hết giờ có status 'timeout': worker của nó bị kill và thay bằng
+# worker mới, các worker khác giữ nguyên.
+def run_pool(tasks, target, workers=None, timeout=None):
+    workers = workers or os.cpu_count() or 1
+    pending = iter(tasks)
+    idle = []
+    running = {}    # conn -> (worker, key, start)
+    exhausted = False
+
+    try:
+        while not exhausted or running:
+            while not exhausted and len(running) < workers:
+                task = next(pending, None)
+                if task is None:
+                    exhausted = True
+                    break
+                key, args = task
+                worker = idle.pop() if idle else _PoolWorker()
+                try:
+                    worker.conn.send((target, args))
+                except OSError:     # Worker đã chết từ trước
+                    worker.stop(kill=True)
+                    worker = _PoolWorker()
+                    worker.conn.send((target, args))
+                running[worker.conn] = (worker, key, time.perf_counter())
+            if not running:
+                break
+
+            # Chờ tới khi có task xong hoặc task sớm nhất hết giờ
+            wait_time = None
+            if timeout is not None:
+                now = time.perf_counter()
+                wait_time = max(0.0, min(start + timeout - now for _, _, start in running.values()))
+            ready = wait(list(running), timeout=wait_time)
+
+            now = time.perf_counter()
+            for conn in list(running):
+                worker, key, start = running[conn]
+                if conn in ready:
+                    try:
+                        record = conn.recv()
+                        idle.append(worker)
+                    except EOFError:    # Tiến trình chết trước khi gửi kết quả
+                        worker.proc.join()
+                        record = {'status': 'error', 'error': f"worker exited with code {worker.proc.exitcode}"}
+                        worker.stop(kill=True)
+                elif timeout is not None and now - start >= timeout:
+                    worker.stop(kill=True)
+                    record = {'status': 'timeout'}
+                else:
+                    continue
+                del running[conn]
+                record['wall_time'] = round(now - start, 6)
+                yield key, record
+    finally:
+        for worker, _, _ in running.values():
+            worker.stop(kill=True)
+        for worker in idle:
+            worker.stop()
+
+# Giải nhiều puzzle song song, ghi lời giải ra output_dir và (tuỳ chọn) summary JSON-lines.
+def run_batch(pattern, solver_name, output_dir='Outputs', workers=None, timeout=None, summary=None):
+    if solver_name not in SOLVERS:
+        raise ValueError(f"Unknown solver '{solver_name}', expected one of {', '.join(SOLVERS)}")
+    load_solver(solver_name)    # Import trong tiến trình cha để các worker fork ra có sẵn
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = []
+    for input_file in collect_inputs(pattern):
+        output_file = output_path(input_file, output_dir)
+        tasks.append(((input_file, output_file), (input_file, output_file, solver_name)))
+
+    summary_file = open(summary, 'w') if summary else None
+    try:
+        for (input_file, output_file), result in run_pool(tasks, solve_file, workers, timeout):
+            # Phân biệt với bảng vô nghiệm, và không để lại lời giải cũ của lần chạy trước
+            if result['status'] == 'timeout':
+                with open(output_file, 'w') as f:
+                    f.write(f"Timed out after {timeout:g} s\n")
+            elif result['status'] == 'error':
+                with open(output_file, 'w') as f:
+                    f.write(f"Error: {result['error']}\n")
+            record = {'input': input_file, 'output': output_file, 'solver': solver_name}
+            record.update(result)
+            if summary_file:
+                summary_file.write(json.dumps(record) + '\n')
+                summary_file.flush()
+            yield record
+    finally:
+        if summary_file:
+            summary_file.close()
+
+# Giải mọi puzzle trong file JSON-lines, ghi lời giải dạng danh sách cạnh ra
+# solutions_path theo thứ tự hoàn thành. Puzzle được đọc dần nên bộ nhớ không
+# tăng theo kích thước file.
+def run_stream(puzzles_path, solver_name, solutions_path, workers=None, timeout=None, summary=None):
+    from puzzle_io import read_puzzles, solution_record, open_stream
+    if solver_name not in SOLVERS:
+        raise ValueError(f"Unknown solver '{solver_name}', expected one of {', '.join(SOLVERS)}")
+    load_solver(solver_name)
+    tasks = ((puzzle_id, (grid, solver_name)) for puzzle_id, grid in read_puzzles(puzzles_path))
+
+    summary_file = open(summary, 'w') if summary else None
+    try:
+        with open_stream(solutions_path, 'w') as out:
+            for puzzle_id, result in run_pool(tasks, solve_grid, workers, timeout):
+                edges = result.pop('edges', None)
+                out.write(json.dumps(solution_record(puzzle_id, edges, result['status']),
+                                     separators=(',', ':')) + '\n')
+                record = {'input': puzzles_path, 'id': puzzle_id, 'output': solutions_path, 'solver': solver_name}
+                record.update(result)
+                if summary_file:
+                    summary_file.write(json.dumps(record) + '\n')
+                    summary_file.flush()
+                yield record
+    finally:
+        if summary_file:
+            summary_file.close()
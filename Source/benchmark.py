@@ -0,0 +1,173 @@
+import sys
+import argparse
+import json
+import os
+import platform
+import time
+from batch import SOLVERS, collect_inputs, run_pool
+from puzzle_generator import generate_board
+from generator import CARDINALITY_ENCODINGS, BRIDGE_ENCODINGS, encoding_sizes
+from solver_stats import SolverStats
+from board import as_board
+
+# Hàm giải trên CNF có sẵn của từng solver (module, hàm)
+CNF_SOLVERS = {
+    'pysat': ('pySAT_solver', 'solve_cnf_pysat'),
+    'bruteforce': ('brute_force_solver', 'solve_cnf_bruteforce'),
+    'backtracking': ('backtracking_solver', 'solve_cnf_backtracking'),
+    'cdcl': ('backtracking_solver', 'solve_cnf_cdcl'),
+    'astar': ('astar_solver', 'solve_connected_astar'),
+}
+
+def case_record(edges, stats):
+    record = {'status': 'solved' if edges is not None else 'unsolved'}
+    record.update((key, value) for key, value in stats.items() if key != 'solver')
+    return record
+
+# hashi và portfolio tự đo thời gian dựng bài toán / giải; các solver CNF được
+# gọi trên CNF mã hóa theo encoding (không qua cache)
+def run_case(solver_name, grid, mode, encoding=None):
+    import importlib
+    from generator import generateCNF
+    stats = SolverStats(solver_name)
+    if solver_name == 'hashi':
+        from hashi_solver import solve_hashi
+        return case_record(solve_hashi(grid, stats, verbose=False), stats)
+    if solver_name == 'portfolio':
+        from portfolio import solve_portfolio
+        return case_record(solve_portfolio(grid, stats=stats, verbose=False), stats)
+    module_name, func_name = CNF_SOLVERS[solver_name]
+    solve_cnf = getattr(importlib.import_module(module_name), func_name)
+
+    data = generateCNF(grid, **(encoding or {}))
+    stats.set_cnf(data)
+    solve_start = time.perf_counter()
+    if solver_name == 'bruteforce':
+        edges = solve_cnf(data, stats=stats)
+    else:
+        edges = solve_cnf(data, mode, stats=stats)
+    stats.finish(time.perf_counter() - solve_start)
+
+    record = case_record(edges, stats)
+    record['encoding'] = data['encoding']
+    return record
+
+def build_cases(inputs, sizes, per_size, seed):
+    from main import read_input
+    cases = []
+    if inputs:
+        for input_file in collect_inputs(inputs):
+            grid = read_input(input_file)
+            if grid:
+                cases.append((os.path.basename(input_file), grid))
+    for size in sizes:
+        for i in range(per_size):
+            cases.append((f"gen-{size}x{size}-{i}", generate_board(size, seed=f"{seed}-{size}-{i}")))
+    return cases
+
+def run_benchmark(solvers, cases, mode='cut', timeout=None, repeat=1, workers=1, encoding=None):
+    tasks = []
+    for solver_name in solvers:
+        for name, grid in cases:
+            for run in range(repeat):
+                tasks.append(((solver_name, name, run), (solver_name, grid, mode, encoding)))
+    boards = {name: as_board(grid) for name, grid in cases}
+    sizes = {name: (board.rows, board.cols, len(board.islands)) for name, board in boards.items()}
+
+    best = {}
+    for (solver_name, name, run), record in run_pool(tasks, run_case, workers, timeout):
+        rows, cols, islands = sizes[name]
+        record.update({'solver': solver_name, 'case': name, 'rows': rows, 'cols': cols, 'islands': islands})
+        key = (solver_name, name)
+        # Giữ lần chạy nhanh nhất trong các lần lặp
+        if key not in best or (record['status'] == 'solved' and
+                               record.get('solve_time', float('inf')) < best[key].get('solve_time', float('inf'))):
+            best[key] = record
+        print(f"[{solver_name}] {name}: {record['status']}"
+              + (f" encode {record['encode_time']:.4f}s solve {record['solve_time']:.4f}s"
+                 f" ({record['iterations']} iterations)" if 'solve_time' in record else ''),
+              file=sys.stderr, flush=True)
+    return [best[(solver_name, name)] for solver_name in solvers for name, _ in cases]
+
+# So sánh với baseline: chậm hơn quá threshold (và quá min_delta giây) là hồi quy
+def find_regressions(results, baseline, threshold=0.2, min_delta=0.01):
+    previous = {(r['solver'], r['case']): r for r in baseline['results']}
+    regressions = []
+    for record in results:
+        old = previous.get((record['solver'], record['case']))
+        if old is None or old['status'] != 'solved':
+            continue
+        if record['status'] != 'solved':
+            regressions.append(f"{record['solver']} {record['case']}: {old['status']} -> {record['status']}")
+            continue
+        old_time = old['encode_time'] + old['solve_time']
+        new_time = record['encode_time'] + record['solve_time']
+        if new_time > old_time * (1 + threshold) and new_time - old_time > min_delta:
+            regressions.append(f"{record['solver']} {record['case']}: {old_time:.4f}s -> {new_time:.4f}s "
+                               f"(+{(new_time / old_time - 1) * 100:.0f}%)")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Hashiwokakero solvers.")
+    parser.add_argument('--solvers', default=','.join(SOLVERS), help="comma-separated solver names")
+    parser.add_argument('--inputs', default='Inputs', help="directory or glob of puzzle files ('' to skip)")
+    parser.add_argument('--sizes', default='10,20,40', help="comma-separated sizes of generated boards ('' to skip)")
+    parser.add_argument('--per-size', type=int, default=3, help="generated boards per size")
+    parser.add_argument('--seed', default='0')
+    parser.add_argument('--mode', choices=['cut', 'block'], default='cut', help="connectivity re-solve mode")
+    parser.add_argument('--cardinality', choices=['auto'] + list(CARDINALITY_ENCODINGS), default='auto',
+                        help="island sum encoding")
+    parser.add_argument('--bridges', choices=BRIDGE_ENCODINGS, default='ordered', help="bridge count encoding")
+    parser.add_argument('--no-preprocess', action='store_true',
+                        help="encode the whole grid instead of only the edges left open by forced-bridge deduction")
+    parser.add_argument('--encodings', action='store_true',
+                        help="only report variable/clause counts of every encoding for each case")
+    parser.add_argument('--timeout', type=float, default=30.0, help="per-run timeout in seconds")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per case, the fastest is kept")
+    parser.add_argument('-j', '--workers', type=int, default=1)
+    parser.add_argument('-o', '--output', default=None, help="write results as JSON")
+    parser.add_argument('--baseline', default=None, help="fail if slower than this results file")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown ratio (0.2 = 20%%)")
+    parser.add_argument('--min-delta', type=float, default=0.01, help="ignore slowdowns below this many seconds")
+    args = parser.parse_args(argv)
+
+    solvers = [s for s in args.solvers.split(',') if s]
+    for solver_name in solvers:
+        if solver_name not in SOLVERS:
+            parser.error(f"unknown solver '{solver_name}'")
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    cases = build_cases(args.inputs, sizes, args.per_size, args.seed)
+
+    if args.encodings:
+        report = {name: encoding_sizes(grid, preprocess=(False, True)) for name, grid in cases}
+    else:
+        encoding = {'cardinality': args.cardinality, 'bridges': args.bridges,
+                    'preprocess': not args.no_preprocess}
+        results = run_benchmark(solvers, cases, args.mode, args.timeout, args.repeat, args.workers, encoding)
+        report = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'mode': args.mode,
+            'encoding': encoding,
+            'timeout': args.timeout,
+            'results': results,
+        }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+    else:
+        json.dump(report, sys.stdout, indent=1)
+        print()
+
+    if args.baseline and not args.encodings:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.threshold, args.min_delta)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+from bisect import bisect_right
+
+# Bảng thưa: chỉ lưu các đảo {(x, y): giá trị} theo thứ tự hàng, cùng chỉ mục
+# theo hàng (row_index[x] = các cột có đảo, đã sắp) và theo cột (col_index[y]
+# = các hàng có đảo, đã sắp). Đảo kề bên phải / bên dưới tìm bằng bisect trong
+# O(log n), không duyệt ô trống, nên bảng 1000x1000 với vài nghìn đảo không
+# cần dựng lưới đặc.
+# Board vẫn dùng được như lưới list các list (len(board), board[x][y], duyệt
+# từng hàng) cho các đoạn code cũ; các đoạn code nóng dùng islands / edges().
+class Board:
+    def __init__(self, rows, cols, islands):
+        self.rows = rows
+        self.cols = cols
+        self.islands = {}
+        self.row_index = {}
+        self.col_index = {}
+        for (x, y), value in sorted(islands.items()):
+            if not value:
+                continue
+            if not (0 <= x < rows and 0 <= y < cols):
+                raise ValueError(f"Island ({x}, {y}) is outside the {rows}x{cols} board")
+            self.islands[(x, y)] = value
+            self.row_index.setdefault(x, []).append(y)
+            self.col_index.setdefault(y, []).append(x)
+
+    @classmethod
+    def from_grid(cls, grid):
+        islands = {(x, y): v for x, row in enumerate(grid) for y, v in enumerate(row) if v}
+        return cls(len(grid), len(grid[0]) if grid else 0, islands)
+
+    def to_grid(self):
+        grid = [[0] * self.cols for _ in range(self.rows)]
+        for (x, y), value in self.islands.items():
+            grid[x][y] = value
+        return grid
+
+    def value(self, x, y):
+        return self.islands.get((x, y), 0)
+
+    # Cột của đảo gần nhất bên phải (x, y), None nếu không có
+    def right(self, x, y):
+        ys = self.row_index.get(x, ())
+        k = bisect_right(ys, y)
+        return ys[k] if k < len(ys) else None
+
+    # Hàng của đảo gần nhất bên dưới (x, y), None nếu không có
+    def down(self, x, y):
+        xs = self.col_index.get(y, ())
+        k = bisect_right(xs, x)
+        return xs[k] if k < len(xs) else None
+
+    # Các cạnh ứng viên (x1, y1, x2, y2): với mỗi đảo theo thứ tự hàng, cạnh
+    # sang phải rồi cạnh xuống dưới, cùng thứ tự với cách duyệt lưới đặc
+    def edges(self):
+        for x, y in self.islands:
+            dy = self.right(x, y)
+            if dy is not None:
+                yield (x, y, x, dy)
+            dx = self.down(x, y)
+            if dx is not None:
+                yield (x, y, dx, y)
+
+    # (x1, y1) và (x2, y2) là hai đảo kề nhau, không có đảo nào ở giữa
+    def adjacent(self, x1, y1, x2, y2):
+        if (x1, y1) not in self.islands:
+            return False
+        if x1 == x2:
+            return y2 > y1 and self.right(x1, y1) == y2
+        if y1 == y2:
+            return x2 > x1 and self.down(x1, y1) == x2
+        return False
+
+    # Giao diện lưới
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, x):
+        if not 0 <= x < self.rows:
+            raise IndexError(x)
+        return BoardRow(self, x)
+
+    def __iter__(self):
+        return (BoardRow(self, x) for x in range(self.rows))
+
+    def __eq__(self, other):
+        if isinstance(other, Board):
+            return (self.rows, self.cols, self.islands) == (other.rows, other.cols, other.islands)
+        return NotImplemented
+
+class BoardRow:
+    def __init__(self, board, x):
+        self.board = board
+        self.x = x
+
+    def __len__(self):
+        return self.board.cols
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.board.cols:
+            raise IndexError(y)
+        return self.board.islands.get((self.x, y), 0)
+
+    def __iter__(self):
+        row = [0] * self.board.cols
+        for y in self.board.row_index.get(self.x, ()):
+            row[y] = self.board.islands[(self.x, y)]
+        return iter(row)
+
+def as_board(grid):
+    return grid if isinstance(grid, Board) else Board.from_grid(grid)
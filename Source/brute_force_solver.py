@@ -1,57 +1,130 @@
-from generator import generateCNF, is_connected
+from cnf_cache import load_or_generate
+from generator import is_connected, model_edges
+from solver_stats import SolverStats, record_iteration
 import itertools
 import time
 
-def solve_cnf_bruteforce(data):
-    clauses = data['cnf']
-    reverse_map = data['reverse_map']
+# numpy được import trong từng hàm: bảng mà tiền xử lý đã quyết định hết mọi
+# cạnh (không còn biến) được giải mà không phải tải numpy.
+# Mỗi phép gán được nén thành W từ 64 bit: bit j của phép gán = giá trị của all_vars[j].
+# MĐ c đúng khi (a & pos[c]) != 0 hoặc (~a & neg[c]) != 0.
+def clause_masks(clauses, column, words):
+    import numpy as np
+    pos = np.zeros((len(clauses), words), dtype=np.uint64)
+    neg = np.zeros((len(clauses), words), dtype=np.uint64)
+    for c, clause in enumerate(clauses):
+        for lit in clause:
+            j = column[abs(lit)]
+            target = pos if lit > 0 else neg
+            target[c, j >> 6] |= np.uint64(1 << (j & 63))
+    return pos, neg
+
+# Nén một khối tổ hợp (mỗi hàng là k chỉ số biến True) thành các từ bit
+def pack_block(block, words):
+    import numpy as np
+    packed = np.zeros((len(block), words), dtype=np.uint64)
+    if block.shape[1] == 0:
+        return packed
+    bits = np.left_shift(np.uint64(1), (block & 63).astype(np.uint64))
+    for w in range(words):
+        packed[:, w] = np.where(block >> 6 == w, bits, np.uint64(0)).sum(axis=1, dtype=np.uint64)
+    return packed
+
+# Giữ lại các phép gán thỏa mọi MĐ, theo từng nhóm MĐ để loại sớm
+def filter_block(packed, pos, neg, chunk=32):
+    import numpy as np
+    for start in range(0, len(pos), chunk):
+        if len(packed) == 0:
+            break
+        a = packed[:, None, :]
+        p = pos[None, start:start + chunk]
+        n = neg[None, start:start + chunk]
+        satisfied = (((a & p) | (~a & n)) != 0).any(axis=2).all(axis=1)
+        packed = packed[satisfied]
+    return packed
+
+def solve_cnf_bruteforce(data, stats=None, block_size=4096):
+    clauses = data['cnf'].to_lists()
     island_map = data['island_map']
+    # Có MĐ rỗng (vd. tiền xử lý đã thấy bảng vô nghiệm): không cần duyệt phép gán nào
+    if any(not clause for clause in clauses):
+        if stats is not None:
+            stats['assignments'] = 0
+        record_iteration(stats, 0.0, satisfiable=False)
+        return None
     
     all_vars = sorted(set(abs(lit) for clause in clauses for lit in clause))
     n = len(all_vars)
+    if n == 0:
+        # Chỉ có phép gán rỗng: đúng khi không có MĐ (rỗng) nào
+        if stats is not None:
+            stats['assignments'] = 1
+        if clauses:
+            return None
+        active_edges = model_edges([], data)
+        connected = is_connected(active_edges, island_map)
+        record_iteration(stats, 0.0, satisfiable=True, connected=connected, assignments=1)
+        return active_edges if connected else None
+
+    import numpy as np
+    words = max(1, (n + 63) // 64)
+    column = {var: j for j, var in enumerate(all_vars)}
+    # MĐ ngắn trước để loại phép gán sớm; bỏ MĐ luôn đúng
+    checked_clauses = sorted((c for c in clauses if not any(-lit in c for lit in c)), key=len)
+    pos, neg = clause_masks(checked_clauses, column, words)
+    checked = 0
+    # Mỗi mô hình thỏa CNF được kiểm tra liên thông tính là một lần lặp
+    last_check = time.perf_counter()
     
-    for k in range(0, n+1):
-        for combo in itertools.combinations(all_vars, k):
-            assignment = {}
-            for var in all_vars:
-                assignment[var] = var in combo
-            
-            satisfied = True
-            for clause in clauses:
-                clause_satisfied = False
-                for lit in clause:
-                    var = abs(lit)
-                    if (lit > 0 and assignment.get(var, False)) or (lit < 0 and not assignment.get(var, False)):
-                        clause_satisfied = True
+    try:
+        # Duyệt theo đúng thứ tự cũ: số biến True tăng dần, tổ hợp theo thứ tự từ điển
+        for k in range(0, n+1):
+            combos = itertools.combinations(range(n), k)
+            while True:
+                if k == 0:
+                    if checked:
                         break
-                if not clause_satisfied:
-                    satisfied = False
-                    break
-            
-            if satisfied:
-                active_edges = []
-                for var in all_vars:
-                    if assignment.get(var, False) and var in reverse_map:
-                        active_edges.append(reverse_map[var])
+                    block = np.zeros((1, 0), dtype=np.int64)
+                else:
+                    flat = np.fromiter(itertools.chain.from_iterable(itertools.islice(combos, block_size)),
+                                       dtype=np.int64)
+                    if flat.size == 0:
+                        break
+                    block = flat.reshape(-1, k)
+                checked += len(block)
                 
-                if is_connected(active_edges, island_map):
-                    return active_edges
+                for a in filter_block(pack_block(block, words), pos, neg):
+                    active_edges = model_edges([var for j, var in enumerate(all_vars)
+                                                if int(a[j >> 6]) >> (j & 63) & 1], data)
+                    connected = is_connected(active_edges, island_map)
+                    now = time.perf_counter()
+                    record_iteration(stats, now - last_check, satisfiable=True, connected=connected,
+                                     assignments=checked)
+                    last_check = now
+                    if connected:
+                        return active_edges
+    finally:
+        if stats is not None:
+            stats['assignments'] = checked
     
     return None
 
-def solve_bruteforce(grid):
+def solve_bruteforce(grid, stats=None, verbose=True, return_stats=False):
+    stats = stats if stats is not None else SolverStats('bruteforce')
     if not grid or not grid[0]:
-        print("Empty or invalid grid.")
-        return None
-    
+        if verbose:
+            print("Empty or invalid grid.")
+        return (None, stats) if return_stats else None
+    data = load_or_generate(grid)
+    stats.set_cnf(data)
     start_time = time.perf_counter()
+    solution = solve_cnf_bruteforce(data, stats)
+    stats.finish(time.perf_counter() - start_time)
     
-    data = generateCNF(grid)
-    solution = solve_cnf_bruteforce(data)
+    if verbose:
+        elapsed = stats.total_time()
+        rate = stats['assignments'] / elapsed if elapsed > 0 else 0
+        print(f"[Brute-force] Solved in {elapsed:.4f} seconds "
+              f"({stats['assignments']} assignments, {rate:,.0f} assignments/s)")
     
-    end_time = time.perf_counter()
-    elapsed = end_time - start_time
-    print(f"[Brute-force] Solved in {elapsed:.4f} seconds")
-    
-    return solution
-
+    return (solution, stats) if return_stats else solution
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import mmap
+import os
+import time
+from array import array
+from pysat.formula import IDPool
+from generator import generateCNF, CARDINALITY_ENCODINGS, BRIDGE_ENCODINGS
+from flat_cnf import FlatCNF
+from board import as_board
+
+# Cache CNF trên đĩa, khóa là hash nội dung lưới + tùy chọn mã hóa.
+# Mỗi file là một mảng int32 phẳng:
+#   [MAGIC, VERSION, n_clauses, n_lits, n_edges, n_islands, top, cardinality, bridges,
+#    preprocess, n_fixed, fixed_edges, offsets (n_clauses + 1), lits (n_lits),
+#    edges (n_edges * 6: x1, y1, x2, y2, v1, v2), islands (n_islands * 3: x, y, value),
+#    fixed (n_fixed * 5: x1, y1, x2, y2, w)]
+# và được đọc lại bằng mmap.
+MAGIC = 0x464E4348      # 'HCNF'
+VERSION = 3
+HEADER = 12
+CARDINALITIES = list(CARDINALITY_ENCODINGS)
+
+# Khóa tính trên kích thước và danh sách đảo, nên lưới đặc và Board cùng nội dung
+# dùng chung một file
+def cache_key(grid, options=None):
+    board = as_board(grid)
+    digest = hashlib.sha256()
+    digest.update(f"v{VERSION}|{json.dumps(options or {}, sort_keys=True)}|{board.rows}x{board.cols}|".encode())
+    for (x, y), value in board.islands.items():
+        digest.update(f"{x},{y},{value};".encode())
+    return digest.hexdigest()
+
+def pack(data):
+    cnf = data['cnf']
+    edges = array('i')
+    for (x1, y1, x2, y2), (v1, v2) in data['edge_vars'].items():
+        edges.extend((x1, y1, x2, y2, v1, v2))
+    islands = array('i')
+    for (x, y), value in data['island_map'].items():
+        islands.extend((x, y, value))
+    fixed = array('i')
+    for edge in data.get('fixed', ()):
+        fixed.extend(edge)
+    header = array('i', [MAGIC, VERSION, len(cnf), cnf.num_lits(), len(data['edge_vars']),
+                         len(data['island_map']), data['vpool'].top,
+                         CARDINALITIES.index(data['encoding']['cardinality']),
+                         BRIDGE_ENCODINGS.index(data['encoding']['bridges']),
+                         int(data['encoding']['preprocess']), len(fixed) // 5, data['stats'].get('fixed_edges', 0)])
+    return header + cnf.offsets + cnf.lits + edges + islands + fixed
+
+# Sao chép count số int32 từ vị trí start (flat là array hoặc memoryview của mmap)
+def _copy(flat, start, count):
+    values = array('i')
+    values.frombytes(memoryview(flat)[start:start + count].cast('B'))
+    return values
+
+def unpack(flat):
+    (magic, version, n_clauses, n_lits, n_edges, n_islands, top, cardinality, bridges,
+     preprocess, n_fixed, fixed_edges) = flat[:HEADER]
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a CNF cache file")
+    pos = HEADER
+    # Sao chép thẳng hai mảng của FlatCNF, không tạo list cho từng mệnh đề
+    offsets = _copy(flat, pos, n_clauses + 1)
+    pos += n_clauses + 1
+    cnf = FlatCNF(_copy(flat, pos, n_lits), offsets)
+    pos += n_lits
+    edge_vars = {}
+    reverse_map = {}
+    values = iter(flat[pos:pos + n_edges * 6].tolist())
+    for x1, y1, x2, y2, v1, v2 in zip(*[values] * 6):
+        edge_vars[(x1, y1, x2, y2)] = (v1, v2)
+        reverse_map[v1] = (x1, y1, x2, y2, 1)
+        reverse_map[v2] = (x1, y1, x2, y2, 2)
+    pos += n_edges * 6
+    values = iter(flat[pos:pos + n_islands * 3].tolist())
+    island_map = {(x, y): value for x, y, value in zip(*[values] * 3)}
+    pos += n_islands * 3
+    values = iter(flat[pos:pos + n_fixed * 5].tolist())
+    fixed = list(zip(*[values] * 5))
+    return {
+        'cnf': cnf,
+        'edge_vars': edge_vars,
+        'reverse_map': reverse_map,
+        'island_map': island_map,
+        'fixed': fixed,
+        'vpool': IDPool(start_from=top + 1),
+        'encoding': {'cardinality': CARDINALITIES[cardinality], 'bridges': BRIDGE_ENCODINGS[bridges],
+                     'preprocess': bool(preprocess)},
+        'stats': {'fixed_edges': fixed_edges},
+    }
+
+class CNFCache:
+    def __init__(self, path, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, key + '.cnf')
+
+    def get(self, key):
+        filename = self._file(key)
+        try:
+            with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm).cast('i')
+                try:
+                    data = unpack(view)
+                finally:
+                    view.release()
+            os.utime(filename)      # Đánh dấu vừa dùng cho LRU
+        except (OSError, ValueError):
+            return None
+        return data
+
+    def put(self, key, data):
+        filename = self._file(key)
+        tmp = f"{filename}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            pack(data).tofile(f)
+        os.replace(tmp, filename)
+        self.evict()
+
+    # Xóa file dùng lâu nhất cho tới khi tổng dung lượng <= max_bytes
+    def evict(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.path):
+            if entry.name.endswith('.cnf'):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def load_or_generate(self, grid, options=None):
+        board = as_board(grid)
+        key = cache_key(board, options)
+        start_time = time.perf_counter()
+        data = self.get(key)
+        if data is not None:
+            self.hits += 1
+            data['timings'] = {'cache_load': time.perf_counter() - start_time}
+            data['stats'].update(variables=data['vpool'].top, clauses=len(data['cnf']),
+                                 encode_time=data['timings']['cache_load'])
+            return data
+        self.misses += 1
+        data = generateCNF(board, **(options or {}))
+        self.put(key, data)
+        return data
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+# Cache mặc định, bật bằng biến môi trường HASHI_CNF_CACHE=<thư mục>
+_default = None
+
+def default_cache():
+    global _default
+    path = os.environ.get('HASHI_CNF_CACHE')
+    if not path:
+        return None
+    if _default is None or _default.path != path:
+        max_mb = float(os.environ.get('HASHI_CNF_CACHE_MB', 256))
+        _default = CNFCache(path, int(max_mb * 1024 * 1024))
+    return _default
+
+# Dùng thay cho generateCNF(grid) trong các solver
+def load_or_generate(grid, options=None):
+    cache = default_cache()
+    if cache is None:
+        return generateCNF(grid, **(options or {}))
+    return cache.load_or_generate(grid, options)
@@ -0,0 +1,144 @@
+# Theo dõi liên thông trong lúc tìm kiếm.
+# Một cạnh còn "có thể" nếu v1 và v2 chưa cùng bị gán False. Nếu các cạnh còn
+# có thể không nối được mọi đảo thì phép gán bộ phận hiện tại bị loại ngay.
+
+class RollbackUnionFind:
+    # Union theo kích thước, không nén đường đi, để có thể hoàn tác theo lịch sử
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.size = [1] * n
+        self.history = []
+        self.components = n
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    def union(self, i, j):
+        i, j = self.find(i), self.find(j)
+        if i == j:
+            return False
+        if self.size[i] > self.size[j]:
+            i, j = j, i
+        self.parent[i] = j
+        self.size[j] += self.size[i]
+        self.history.append(i)
+        self.components -= 1
+        return True
+
+    def mark(self):
+        return len(self.history)
+
+    def rollback(self, mark):
+        while len(self.history) > mark:
+            i = self.history.pop()
+            j = self.parent[i]
+            self.parent[i] = i
+            self.size[j] -= self.size[i]
+            self.components += 1
+
+
+class ConnectivityTracker:
+    # fixed: các cầu cố định bởi tiền xử lý, không có biến nên được nối sẵn
+    def __init__(self, edge_vars, island_map, fixed=()):
+        index = {island: i for i, island in enumerate(island_map)}
+        self.edges = []
+        self.var_edge = {}
+        self.bridge_mask = 0
+        for e, ((x1, y1, x2, y2), (v1, v2)) in enumerate(edge_vars.items()):
+            self.edges.append((index[(x1, y1)], index[(x2, y2)], v1, v2))
+            self.var_edge[v1] = e
+            self.var_edge[v2] = e
+            self.bridge_mask |= (1 << v1) | (1 << v2)
+        self.false_count = [0] * len(self.edges)
+        self.true_count = [0] * len(self.edges)
+        self.uf = RollbackUnionFind(len(island_map))     # Các cầu đã chắc chắn có
+        for x1, y1, x2, y2, _ in fixed:
+            self.uf.union(index[(x1, y1)], index[(x2, y2)])
+        self.log = []
+        self.dirty = True
+        self.checks = 0
+
+    def assign(self, lit):
+        e = self.var_edge.get(abs(lit))
+        if e is None:
+            return
+        if lit > 0:
+            self.true_count[e] += 1
+            self.log.append((e, True, self.uf.mark()))
+            i, j, _, _ = self.edges[e]
+            self.uf.union(i, j)
+        else:
+            self.false_count[e] += 1
+            self.log.append((e, False, None))
+            if self.false_count[e] == 2:
+                self.dirty = True
+
+    def mark(self):
+        return len(self.log)
+
+    # Hoàn tác về mark. Trạng thái cũ có nhiều cạnh khả dĩ hơn nên kết quả
+    # kiểm tra liên thông trước đó (nếu đã đúng) vẫn còn đúng.
+    def undo(self, mark):
+        while len(self.log) > mark:
+            e, value, uf_mark = self.log.pop()
+            if value:
+                self.true_count[e] -= 1
+                self.uf.rollback(uf_mark)
+            else:
+                self.false_count[e] -= 1
+
+    # Các cạnh còn có thể có nối được mọi đảo không. Chỉ tính lại khi có cạnh
+    # vừa bị loại kể từ lần kiểm tra thành công gần nhất.
+    def feasible(self):
+        if not self.dirty:
+            return True
+        self.checks += 1
+        uf = self.uf
+        mark = uf.mark()
+        for e, (i, j, _, _) in enumerate(self.edges):
+            if self.false_count[e] < 2 and self.true_count[e] == 0:
+                uf.union(i, j)
+                if uf.components == 1:
+                    break
+        ok = uf.components <= 1     # Không có đảo nào cũng là liên thông
+        uf.rollback(mark)
+        if ok:
+            self.dirty = False
+        return ok
+
+    # Giải thích cho feasible() == False (dùng làm mệnh đề xung đột của CDCL):
+    # các cạnh còn có thể chia đảo thành nhiều thành phần; trả về mệnh đề
+    # [v1, v2, ...] gồm các cạnh đã bị loại nối thành phần có ít cạnh biên nhất
+    # ra ngoài. Mọi literal của mệnh đề đang sai.
+    def cut_clause(self):
+        uf = self.uf
+        mark = uf.mark()
+        for e, (i, j, _, _) in enumerate(self.edges):
+            if self.false_count[e] < 2 and self.true_count[e] == 0:
+                uf.union(i, j)
+        boundary = {}
+        for e, (i, j, v1, v2) in enumerate(self.edges):
+            ri, rj = uf.find(i), uf.find(j)
+            if ri != rj:
+                boundary.setdefault(ri, []).extend((v1, v2))
+                boundary.setdefault(rj, []).extend((v1, v2))
+        roots = {uf.find(i) for i in range(len(uf.parent))}
+        uf.rollback(mark)
+        return min((boundary.get(root, []) for root in roots), key=len)
+
+    # Cùng phép kiểm tra cho phép gán dạng bitmask (A*): false_mask là các biến đã gán False
+    def connected_without(self, false_mask):
+        self.checks += 1
+        uf = self.uf
+        mark = uf.mark()
+        for i, j, v1, v2 in self.edges:
+            if not (false_mask >> v1 & 1 and false_mask >> v2 & 1):
+                uf.union(i, j)
+                if uf.components == 1:
+                    break
+        ok = uf.components <= 1     # Không có đảo nào cũng là liên thông
+        uf.rollback(mark)
+        return ok
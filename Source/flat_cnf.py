@@ -0,0 +1,53 @@
+from array import array
+from itertools import accumulate, chain, islice
+
+# CNF lưu phẳng: mọi literal nằm liên tiếp trong một array('i'), mệnh đề i là
+# lits[offsets[i]:offsets[i + 1]]. Không tạo một list nhỏ cho mỗi mệnh đề nên
+# tốn ít bộ nhớ, và cache ghi / đọc thẳng hai mảng này. Lặp qua FlatCNF trả về
+# từng mệnh đề dạng list (dùng được như list các list cho các solver Python);
+# to_lists() tạo hẳn list các list cho solver cần truy cập theo chỉ số.
+class FlatCNF:
+    def __init__(self, lits=None, offsets=None):
+        self.lits = lits if lits is not None else array('i')
+        self.offsets = offsets if offsets is not None else array('i', [0])
+
+    def append(self, clause):
+        self.lits.extend(clause)
+        self.offsets.append(len(self.lits))
+
+    # Chép cả loạt mệnh đề một lần, vòng lặp nằm trong C
+    def extend(self, clauses):
+        if not isinstance(clauses, list):
+            clauses = list(clauses)
+        self.offsets.extend(islice(accumulate(map(len, clauses), initial=len(self.lits)), 1, None))
+        self.lits.extend(chain.from_iterable(clauses))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return self.lits[self.offsets[i]:self.offsets[i + 1]].tolist()
+
+    def __iter__(self):
+        lits = self.lits.tolist()
+        offsets = self.offsets
+        for i in range(len(offsets) - 1):
+            yield lits[offsets[i]:offsets[i + 1]]
+
+    def to_lists(self):
+        return list(self)
+
+    def num_lits(self):
+        return len(self.lits)
+
+    def max_var(self):
+        return max(map(abs, self.lits), default=0)
+
+    # Nạp toàn bộ CNF vào solver pysat bằng một lần append_formula; mỗi mệnh đề
+    # là một lát cắt của lits, không qua list
+    def add_to(self, solver):
+        offsets = self.offsets
+        solver.append_formula(map(self.lits.__getitem__, map(slice, offsets, islice(offsets, 1, None))),
+                              no_return=True)
@@ -1,7 +1,11 @@
-from pysat.card import CardEnc
+from pysat.card import CardEnc, EncType
 from pysat.formula import IDPool
 from collections import defaultdict, deque
-from itertools import combinations
+from itertools import chain, combinations
+from bisect import bisect_left, bisect_right
+import time
+from flat_cnf import FlatCNF
+from board import as_board
 # Kiểm tra 2 cạnh cắt nhau
 def edges_cross(e1, e2):
     (x1, y1, x2, y2) = e1
@@ -12,73 +16,168 @@ def edges_cross(e1, e2):
         return (min(b1, b2) < y1 < max(b1, b2)) and (min(x1, x2) < a1 < max(x1, x2))
     return False
 
-def generateCNF(grid):
-    rows, cols = len(grid), len(grid[0])
-    vpool = IDPool()
-    cnf = []
+# Danh sách cạnh kề (v1, v2) của mỗi đảo, giữ thứ tự của edge_vars
+def island_edges(edge_vars):
+    incident = defaultdict(list)
+    for (a, b, c, d), pair in edge_vars.items():
+        incident[(a, b)].append(pair)
+        incident[(c, d)].append(pair)
+    return incident
+
+# Các cặp chỉ số (i, j), i < j, của những cạnh cắt nhau.
+# Cạnh dọc được sắp theo cột nên mỗi cạnh ngang chỉ xét các cạnh dọc
+# có cột nằm giữa hai đầu mút của nó.
+def crossing_pairs(edges):
+    vertical = sorted((b1, min(a1, a2), max(a1, a2), i)
+                      for i, (a1, b1, a2, b2) in enumerate(edges) if b1 == b2 and a1 != a2)
+    columns = [col for col, _, _, _ in vertical]
+    pairs = []
+    for i, (x1, y1, x2, y2) in enumerate(edges):
+        if x1 != x2 or y1 == y2:
+            continue
+        lo = bisect_right(columns, min(y1, y2))
+        hi = bisect_left(columns, max(y1, y2))
+        for _, top, bottom, j in vertical[lo:hi]:
+            if top < x1 < bottom:
+                pairs.append((i, j) if i < j else (j, i))
+    pairs.sort()
+    return pairs
+
+# Mã hóa tổng số cầu của đảo (ràng buộc "đúng bằng k")
+CARDINALITY_ENCODINGS = {
+    'combinations': None,               # Liệt kê tổ hợp, chỉ hợp với đảo ít cạnh
+    'seqcounter': EncType.seqcounter,
+    'totalizer': EncType.totalizer,
+    'sortnetwrk': EncType.sortnetwrk,
+    'cardnetwrk': EncType.cardnetwrk,
+}
+# Mã hóa số cầu trên một cạnh:
+#   pair:    v1 = đúng 1 cầu, v2 = đúng 2 cầu, [-v1, -v2]; tổng đảo dùng v1 + 2*v2
+#   ordered: v1 = ít nhất 1 cầu, v2 = đúng 2 cầu, [-v2, v1]; tổng đảo dùng v1 + v2,
+#            mỗi số cầu chỉ có một cách gán nên không còn mô hình đối xứng
+BRIDGE_ENCODINGS = ('pair', 'ordered')
+
+# Chọn mã hóa tổng đảo. Với ordered mỗi đảo có tối đa 8 literal phân biệt nên
+# liệt kê tổ hợp luôn nhỏ (<= 2 * C(8, 4) mệnh đề) và không cần biến phụ; với
+# pair v2 bị lặp nên tổ hợp chỉ đáng dùng trên bảng nhỏ.
+def auto_encoding(rows, cols, bridges):
+    if bridges == 'ordered' or rows * cols <= 49:
+        return 'combinations'
+    return 'seqcounter'
+
+def island_sum_clauses(lits, total, encoding, vpool):
+    if total > len(lits):
+        return [[]]
+    if encoding == 'combinations':
+        # Tổ hợp trên danh sách đã đổi dấu cho thẳng mệnh đề "không quá total"
+        negated = [-lit for lit in lits]
+        return chain(combinations(negated, total + 1), combinations(lits, len(lits) - total + 1))
+    return CardEnc.equals(lits=lits, bound=total, vpool=vpool,
+                          encoding=CARDINALITY_ENCODINGS[encoding]).clauses
+
+# preprocess=True: lan truyền trên lưới trước khi mã hóa (bridge_domains).
+# Cạnh đã quyết định không có biến: cầu cố định nằm trong data['fixed'] và được
+# trừ vào tổng của đảo, model_edges tự thêm lại khi giải mã. Cạnh còn miền
+# {0, 1} hoặc {1, 2} giữ biến kèm mệnh đề đơn vị.
+# Cạnh thứ e có biến 2e + 1 và 2e + 2; biến phụ của CardEnc lấy từ vpool, bắt
+# đầu sau biến cầu cuối cùng. CNF được lưu phẳng (FlatCNF).
+# grid là lưới đặc hoặc Board; mã hóa chạy trên danh sách đảo của Board.
+def generateCNF(grid, cardinality='auto', bridges='ordered', preprocess=True):
+    board = as_board(grid)
+    rows, cols = board.rows, board.cols
+    if bridges not in BRIDGE_ENCODINGS:
+        raise ValueError(f"Unknown bridge encoding: {bridges}")
+    if cardinality == 'auto':
+        cardinality = auto_encoding(rows, cols, bridges)
+    if cardinality not in CARDINALITY_ENCODINGS:
+        raise ValueError(f"Unknown cardinality encoding: {cardinality}")
+    ordered = bridges == 'ordered'
+    cnf = FlatCNF()
     edge_vars = {}
     reverse_map = {}
     island_map = {}
-    
+    fixed = []
+    timings = {}
+    domains = {}
+    if preprocess:
+        from hashi_solver import bridge_domains
+        phase_start = time.perf_counter()
+        domains = bridge_domains(board)
+        timings['preprocess'] = time.perf_counter() - phase_start
+        if domains is None:
+            # Lan truyền đã thấy bảng vô nghiệm: CNF chỉ gồm một mệnh đề rỗng,
+            # không có biến, mọi solver thấy ngay là vô nghiệm
+            cnf.append([])
+            return {
+                'cnf': cnf,
+                'edge_vars': edge_vars,
+                'reverse_map': reverse_map,
+                'island_map': dict(board.islands),
+                'fixed': fixed,
+                'vpool': IDPool(),
+                'encoding': {'cardinality': cardinality, 'bridges': bridges, 'preprocess': preprocess},
+                'timings': timings,
+                'stats': {'variables': 0, 'clauses': 1, 'encode_time': sum(timings.values()), 'fixed_edges': 0},
+            }
+
+    # Thêm biến cho cạnh (chưa quyết định) hoặc ghi cầu cố định
+    def add_edge(edge):
+        lo, hi = domains.get(edge, (0, 2))
+        if lo == hi:
+            if lo:
+                fixed.append(edge + (lo,))
+            return
+        v1 = 2 * len(edge_vars) + 1
+        v2 = v1 + 1
+        edge_vars[edge] = (v1, v2)
+        reverse_map[v1] = edge + (1,)
+        reverse_map[v2] = edge + (2,)
+        cnf.append([-v2, v1] if ordered else [-v1, -v2])
+        if lo == 1:
+            cnf.append([v1] if ordered else [v1, v2])
+        if hi == 1:
+            cnf.append([-v2])
+
+    phase_start = time.perf_counter()
     # Tạo biến & ràng buộc tối đa 2 cầu
-    for x in range(rows):
-        for y in range(cols):
-            if grid[x][y] == 0:
-                continue
-            island_map[(x, y)] = grid[x][y]
-            # sang phải
-            for dy in range(y + 1, cols):
-                if grid[x][dy] == 0: continue
-                if all(grid[x][k] == 0 for k in range(y + 1, dy)):
-                    v1 = vpool.id(f"B_{x}_{y}_{x}_{dy}_1")
-                    v2 = vpool.id(f"B_{x}_{y}_{x}_{dy}_2")
-                    edge_vars[(x, y, x, dy)] = (v1, v2)
-                    reverse_map[v1] = (x, y, x, dy, 1)
-                    reverse_map[v2] = (x, y, x, dy, 2)
-                    cnf.append([-v1, -v2])
-                break
-            # xuống dưới
-            for dx in range(x + 1, rows):
-                if grid[dx][y] == 0: continue
-                if all(grid[k][y] == 0 for k in range(x + 1, dx)):
-                    v1 = vpool.id(f"B_{x}_{y}_{dx}_{y}_1")
-                    v2 = vpool.id(f"B_{x}_{y}_{dx}_{y}_2")
-                    edge_vars[(x, y, dx, y)] = (v1, v2)
-                    reverse_map[v1] = (x, y, dx, y, 1)
-                    reverse_map[v2] = (x, y, dx, y, 2)
-                    cnf.append([-v1, -v2])
-                break
-    # Tổng số cầu mỗi đảo
-    for (x, y), total in island_map.items():
-        vars_for_island = []
-        for (a, b, c, d), (v1, v2) in edge_vars.items():
-            if (a, b) == (x, y) or (c, d) == (x, y):
-                vars_for_island.append((v1, 1))
-                vars_for_island.append((v2, 2))
+    island_map.update(board.islands)
+    for edge in board.edges():
+        add_edge(edge)
+    vpool = IDPool(start_from=2 * len(edge_vars) + 1)
+    timings['variables'] = time.perf_counter() - phase_start
+
+    # Danh sách cạnh kề của mỗi đảo
+    phase_start = time.perf_counter()
+    incident = island_edges(edge_vars)
+    remaining = dict(island_map)
+    for x1, y1, x2, y2, w in fixed:
+        remaining[(x1, y1)] -= w
+        remaining[(x2, y2)] -= w
+    # Tổng số cầu mỗi đảo (trừ cầu cố định)
+    for (x, y), total in remaining.items():
         expanded = []
-        for var, weight in vars_for_island:
-            expanded.extend([var] * weight)
+        for v1, v2 in incident.get((x, y), ()):
+            expanded.extend((v1, v2) if ordered else (v1, v2, v2))
         if expanded:
-            if rows <= 5 and cols <= 5:
-                # Map nhỏ: dùng tổ hợp thủ công
-                cnf += [[-lit for lit in comb] for comb in combinations(expanded, total + 1)]
-                cnf += [list(comb) for comb in combinations(expanded, len(expanded) - total + 1)]
-            else:
-                # Map lớn: dùng CardEnc
-                from pysat.card import CardEnc
-                cnf.extend(CardEnc.equals(lits=expanded, bound=total, vpool=vpool).clauses)
-                
+            cnf.extend(island_sum_clauses(expanded, total, cardinality, vpool))
+    timings['island_sums'] = time.perf_counter() - phase_start
+
     # Ràng buộc không cắt nhau
+    phase_start = time.perf_counter()
     edges = list(edge_vars.keys())
-    for i in range(len(edges)):
-        for j in range(i + 1, len(edges)):
-            if edges_cross(edges[i], edges[j]):
-                v1, v2 = edge_vars[edges[i]]
-                u1, u2 = edge_vars[edges[j]]
-                cnf.extend([[-v1, -u1], [-v1, -u2], [-v2, -u1], [-v2, -u2]])
-
+    clauses = []
+    for i, j in crossing_pairs(edges):
+        v1, v2 = edge_vars[edges[i]]
+        u1, u2 = edge_vars[edges[j]]
+        if ordered:
+            clauses.append((-v1, -u1))
+        else:
+            clauses.extend(((-v1, -u1), (-v1, -u2), (-v2, -u1), (-v2, -u2)))
+    cnf.extend(clauses)
+    timings['crossings'] = time.perf_counter() - phase_start
 
     # Ràng buộc hạn chế cô lập
+    phase_start = time.perf_counter()
     for (x1, y1, x2, y2), (v1, v2) in edge_vars.items():
         if island_map.get((x1, y1)) == 1 and island_map.get((x2, y2)) == 1:
             cnf.extend([[-v1], [-v2]])
@@ -87,24 +186,73 @@ def generateCNF(grid):
     # Đặt 4 cầu đôi ở đảo 8
     for (x, y), total in island_map.items():
         if total != 8: continue
-        for (a, b, c, d), (v1, v2) in edge_vars.items():
-            if (a, b) == (x, y) or (c, d) == (x, y):
-                cnf.append([v1])
-                cnf.append([v2])
+        for v1, v2 in incident.get((x, y), ()):
+            cnf.append([v1] if ordered else [-v1])
+            cnf.append([v2])
+    timings['restrictions'] = time.perf_counter() - phase_start
 
     return {
         'cnf': cnf,
         'edge_vars': edge_vars,
         'reverse_map': reverse_map,
         'island_map': island_map,
-        'vpool': vpool
+        'fixed': fixed,
+        'vpool': vpool,
+        'encoding': {'cardinality': cardinality, 'bridges': bridges, 'preprocess': preprocess},
+        'timings': timings,
+        'stats': {'variables': vpool.top, 'clauses': len(cnf), 'encode_time': sum(timings.values()),
+                  'fixed_edges': len(domains) - len(edge_vars) if domains else 0},
     }
 
+# Đọc các cầu (x1, y1, x2, y2, w) từ danh sách biến True của một mô hình,
+# kèm các cầu cố định bởi tiền xử lý
+def model_edges(true_vars, data):
+    reverse_map = data['reverse_map']
+    fixed = list(data.get('fixed', ()))
+    if data['encoding']['bridges'] == 'pair':
+        return fixed + [reverse_map[var] for var in true_vars if var in reverse_map]
+    weights = {}
+    for var in true_vars:
+        if var in reverse_map:
+            x1, y1, x2, y2, weight = reverse_map[var]
+            edge = (x1, y1, x2, y2)
+            weights[edge] = max(weights.get(edge, 0), weight)
+    return fixed + [edge + (weight,) for edge, weight in weights.items()]
+
+# Literal cố định số cầu của một cạnh (0, 1 hoặc 2)
+def bridge_literals(data, edge, weight):
+    v1, v2 = data['edge_vars'][edge]
+    if data['encoding']['bridges'] == 'pair':
+        return [v1 if weight == 1 else -v1, v2 if weight == 2 else -v2]
+    return [v1 if weight >= 1 else -v1, v2 if weight == 2 else -v2]
+
+# Số biến và mệnh đề của từng cách mã hóa trên cùng một bảng
+def encoding_sizes(grid, cardinalities=None, bridges=BRIDGE_ENCODINGS, preprocess=(True,)):
+    board = as_board(grid)
+    sizes = []
+    configs = [(cardinality, bridge, pre) for cardinality in cardinalities or CARDINALITY_ENCODINGS
+               for bridge in bridges for pre in preprocess]
+    for cardinality, bridge, pre in configs:
+        start_time = time.perf_counter()
+        data = generateCNF(board, cardinality, bridge, pre)
+        sizes.append({
+            'cardinality': cardinality,
+            'bridges': bridge,
+            'preprocess': pre,
+            'variables': data['vpool'].top,
+            'clauses': len(data['cnf']),
+            'literals': data['cnf'].num_lits(),
+            'time': time.perf_counter() - start_time,
+        })
+    return sizes
+
 def is_connected(edges, islands):
     graph = defaultdict(list)
     for x1, y1, x2, y2, _ in edges:
         graph[(x1, y1)].append((x2, y2))
         graph[(x2, y2)].append((x1, y1))
+    if not islands:
+        return True
     start = next(iter(islands))
     visited = set()
     queue = deque([start])
@@ -113,4 +261,65 @@ def is_connected(edges, islands):
         if node not in visited:
             visited.add(node)
             queue.extend(graph[node])
-    return len(visited) == len(islands)
\ No newline at end of file
+    return len(visited) == len(islands)
+
+# Kiểm tra đầy đủ một lời giải: cạnh hợp lệ, tổng cầu mỗi đảo, không cắt nhau, liên thông
+def check_solution(grid, edges):
+    board = as_board(grid)
+    islands = board.islands
+    totals = dict.fromkeys(islands, 0)
+    seen = set()
+    for x1, y1, x2, y2, w in edges:
+        if w not in (1, 2) or (x1, y1, x2, y2) in seen:
+            return False
+        seen.add((x1, y1, x2, y2))
+        if (x2, y2) not in islands or not board.adjacent(x1, y1, x2, y2):
+            return False
+        totals[(x1, y1)] += w
+        totals[(x2, y2)] += w
+    if any(totals[island] != value for island, value in islands.items()):
+        return False
+    if crossing_pairs([edge[:4] for edge in edges]):
+        return False
+    return not islands or is_connected(edges, islands)
+
+# Tách các thành phần liên thông của lời giải hiện tại
+def connected_components(edges, islands):
+    graph = defaultdict(list)
+    for x1, y1, x2, y2, _ in edges:
+        graph[(x1, y1)].append((x2, y2))
+        graph[(x2, y2)].append((x1, y1))
+    visited = set()
+    components = []
+    for start in islands:
+        if start in visited:
+            continue
+        component = set()
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            if node not in component:
+                component.add(node)
+                queue.extend(graph[node])
+        visited |= component
+        components.append(component)
+    return components
+
+# Lát cắt liên thông: mỗi thành phần phải có ít nhất 1 cầu đi ra ngoài
+def connectivity_cuts(edges, edge_vars, islands):
+    components = connected_components(edges, islands)
+    if len(components) <= 1:
+        return []
+    cuts = []
+    seen = set()
+    for component in components:
+        clause = []
+        for (x1, y1, x2, y2), (v1, v2) in edge_vars.items():
+            if ((x1, y1) in component) != ((x2, y2) in component):
+                clause.extend([v1, v2])
+        key = frozenset(clause)
+        if key in seen:
+            continue
+        seen.add(key)
+        cuts.append(clause)
+    return cuts
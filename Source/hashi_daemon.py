@@ -0,0 +1,318 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import time
+from multiprocessing.connection import wait
+from batch import SOLVERS, load_solver, solve_grid
+from board import Board
+
+# Dịch vụ giải chạy lâu dài: các tiến trình worker import sẵn mọi solver một lần
+# rồi nhận lưới qua Pipe, nên mỗi request không còn trả chi phí khởi động
+# Python / import pysat / numpy. Giao thức là JSON-RPC 2.0, mỗi dòng một thông điệp,
+# qua stdin/stdout hoặc Unix socket:
+#   {"jsonrpc": "2.0", "id": 1, "method": "solve", "params": {"grid": [[...]], "solver": "pysat"}}
+#   {"jsonrpc": "2.0", "id": 1, "result": {"status": "solved", "edges": [...], ...}}
+# Bảng lớn ít đảo gửi dạng thưa thay cho "grid":
+#   "params": {"rows": 1000, "cols": 1000, "islands": [[x, y, value], ...], "solver": "hashi"}
+# Kết quả có thể về không theo thứ tự request, ghép bằng id. Hàng đợi job có
+# giới hạn: khi đầy, luồng đọc request bị chặn nên client bị chặn theo (backpressure).
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+
+def _serve_worker(conn):
+    sys.stdout = sys.stderr     # Không để solver in lẫn vào luồng JSON-RPC
+    for name in SOLVERS:
+        load_solver(name)
+    # Worker sinh sau giữ bản sao đầu Pipe của worker trước nên EOF không đủ để
+    # biết daemon đã chết; theo dõi thêm tiến trình cha
+    parent = mp.parent_process()
+    while True:
+        if conn not in wait([conn, parent.sentinel]):
+            break
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        grid, solver_name = request
+        try:
+            result = solve_grid(grid, solver_name)
+        except Exception as e:
+            result = {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+        conn.send(result)
+    conn.close()
+
+# Worker được thay thế từ các luồng dispatch; fork từ tiến trình nhiều luồng có
+# thể kẹt (khóa do luồng khác giữ lúc fork), nên worker được sinh từ forkserver
+# đơn luồng đã import sẵn các solver, hoặc bằng spawn nếu nền tảng không có forkserver
+def _context():
+    if 'forkserver' not in mp.get_all_start_methods():
+        return mp.get_context('spawn')
+    ctx = mp.get_context('forkserver')
+    ctx.set_forkserver_preload(sorted({module for module, _ in SOLVERS.values()}))
+    return ctx
+
+# Một tiến trình worker ấm. Job hết giờ thì tiến trình bị kill và thay bằng tiến trình mới.
+class Worker:
+    def __init__(self, ctx=None):
+        self.ctx = ctx or _context()
+        self.proc = None
+        self.conn = None
+        self.start()
+
+    def start(self):
+        self.conn, child_conn = self.ctx.Pipe()
+        self.proc = self.ctx.Process(target=_serve_worker, args=(child_conn,))
+        self.proc.start()
+        child_conn.close()
+
+    def stop(self, kill=False):
+        if kill:
+            self.proc.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+        self.proc.join()
+        self.conn.close()
+
+    def solve(self, grid, solver_name, timeout=None):
+        start = time.perf_counter()
+        try:
+            self.conn.send((grid, solver_name))
+        except OSError:     # Tiến trình đã chết từ trước
+            self.stop(kill=True)
+            self.start()
+            self.conn.send((grid, solver_name))
+        if self.conn.poll(timeout):
+            try:
+                result = self.conn.recv()
+            except EOFError:    # Tiến trình chết giữa chừng
+                result = {'status': 'error', 'error': f"worker exited with code {self.proc.exitcode}"}
+                self.stop(kill=True)
+                self.start()
+        else:
+            result = {'status': 'timeout'}
+            self.stop(kill=True)
+            self.start()
+        result['wall_time'] = round(time.perf_counter() - start, 6)
+        return result
+
+class SolverService:
+    def __init__(self, workers=None, max_pending=None, timeout=None):
+        ctx = _context()
+        self.workers = [Worker(ctx) for _ in range(workers or os.cpu_count() or 1)]
+        self.jobs = queue.Queue(maxsize=max_pending or 2 * len(self.workers))
+        self.timeout = timeout
+        self.started = time.time()
+        self.running = 0
+        self.completed = 0
+        self.lock = threading.Lock()
+        self.threads = [threading.Thread(target=self._dispatch, args=(worker,), daemon=True)
+                        for worker in self.workers]
+        for thread in self.threads:
+            thread.start()
+
+    def _dispatch(self, worker):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            grid, solver_name, timeout, callback = job
+            with self.lock:
+                self.running += 1
+            result = worker.solve(grid, solver_name, timeout)
+            with self.lock:
+                self.running -= 1
+                self.completed += 1
+            callback(result)
+
+    # Chặn khi hàng đợi đầy; callback(result) được gọi từ luồng dispatch
+    def submit(self, grid, solver_name, callback, timeout=None):
+        self.jobs.put((grid, solver_name, timeout if timeout is not None else self.timeout, callback))
+
+    def stats(self):
+        with self.lock:
+            return {'workers': len(self.workers), 'max_pending': self.jobs.maxsize,
+                    'queued': self.jobs.qsize(), 'running': self.running, 'completed': self.completed,
+                    'uptime': round(time.time() - self.started, 3)}
+
+    def close(self):
+        for _ in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join()
+        for worker in self.workers:
+            worker.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _valid_grid(grid):
+    return (isinstance(grid, list) and grid and all(isinstance(row, list) for row in grid)
+            and len({len(row) for row in grid}) == 1 and grid[0]
+            and all(isinstance(v, int) and 0 <= v <= 8 for row in grid for v in row))
+
+# Lưới của request: "grid" đặc hoặc "rows" / "cols" / "islands" thưa; None nếu không hợp lệ
+def _request_grid(params):
+    if 'islands' not in params:
+        grid = params.get('grid')
+        return grid if _valid_grid(grid) else None
+    rows, cols, islands = params.get('rows'), params.get('cols'), params['islands']
+    if not (isinstance(rows, int) and isinstance(cols, int) and rows > 0 and cols > 0
+            and isinstance(islands, list)):
+        return None
+    cells = {}
+    for island in islands:
+        if not (isinstance(island, list) and len(island) == 3 and all(isinstance(v, int) for v in island)):
+            return None
+        x, y, value = island
+        if not (0 <= x < rows and 0 <= y < cols and 1 <= value <= 8) or (x, y) in cells:
+            return None
+        cells[(x, y)] = value
+    return Board(rows, cols, cells)
+
+# Đọc request từ rfile tới EOF, ghi response vào wfile; chờ các job còn dở
+# của kết nối này xong rồi mới trả về.
+def serve_stream(service, rfile, wfile):
+    write_lock = threading.Lock()
+    done = threading.Condition()
+    pending = [0]
+
+    def respond(message_id, result=None, error=None):
+        message = {'jsonrpc': '2.0', 'id': message_id}
+        if error is not None:
+            message['error'] = {'code': error[0], 'message': error[1]}
+        else:
+            message['result'] = result
+        with write_lock:
+            try:
+                wfile.write(json.dumps(message, separators=(',', ':')) + '\n')
+                wfile.flush()
+            except (OSError, ValueError):   # Client đã đóng kết nối
+                pass
+
+    def finished(message_id):
+        def callback(result):
+            respond(message_id, result)
+            with done:
+                pending[0] -= 1
+                done.notify_all()
+        return callback
+
+    for line in rfile:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError:
+            respond(None, error=(PARSE_ERROR, "Parse error"))
+            continue
+        if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+            respond(None, error=(INVALID_REQUEST, "Invalid request"))
+            continue
+        if 'id' not in request:     # Notification: không có gì để trả lời
+            continue
+        message_id = request['id']
+        method = request['method']
+        params = request.get('params') or {}
+        if method == 'solvers':
+            respond(message_id, sorted(SOLVERS))
+        elif method == 'stats':
+            respond(message_id, service.stats())
+        elif method == 'solve':
+            if not isinstance(params, dict):
+                params = {}
+            grid = _request_grid(params)
+            solver_name = params.get('solver', 'pysat')
+            timeout = params.get('timeout')
+            if grid is None or solver_name not in SOLVERS or \
+                    not (timeout is None or isinstance(timeout, (int, float)) and timeout > 0):
+                respond(message_id, error=(INVALID_PARAMS, "Expected params {'grid': [[0-8, ...], ...] or "
+                                                           "'rows', 'cols', 'islands': [[x, y, 1-8], ...], "
+                                                           f"'solver': one of {', '.join(SOLVERS)}, "
+                                                           "'timeout': seconds}"))
+                continue
+            with done:
+                pending[0] += 1
+            service.submit(grid, solver_name, finished(message_id), timeout)
+        else:
+            respond(message_id, error=(METHOD_NOT_FOUND, f"Method not found: {method}"))
+
+    with done:
+        while pending[0]:
+            done.wait()
+
+def serve_socket(service, path):
+    if os.path.exists(path):
+        os.remove(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+
+    def handle(conn):
+        with conn, conn.makefile('r', encoding='utf-8') as rfile, \
+                conn.makefile('w', encoding='utf-8') as wfile:
+            serve_stream(service, rfile, wfile)
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+    finally:
+        server.close()
+        os.remove(path)
+
+# Gửi một request tới daemon qua Unix socket và trả về result
+def call(path, method, **params):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(path)
+        with conn.makefile('rw', encoding='utf-8') as f:
+            f.write(json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params}) + '\n')
+            f.flush()
+            response = json.loads(f.readline())
+    if 'error' in response:
+        raise RuntimeError(response['error']['message'])
+    return response['result']
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep the Hashiwokakero solvers loaded and answer JSON-RPC "
+                                                 "solve requests on stdin/stdout or a Unix socket.")
+    parser.add_argument('--socket', default=None, help="listen on this Unix socket path instead of stdin/stdout")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--max-pending', type=int, default=None,
+                        help="queued requests before reading blocks (default: 2 per worker)")
+    parser.add_argument('-t', '--timeout', type=float, default=None, help="default per-request timeout in seconds")
+    parser.add_argument('--cnf-cache', default=None, help="directory for the on-disk CNF cache")
+    args = parser.parse_args(argv)
+    if args.cnf_cache:
+        os.environ['HASHI_CNF_CACHE'] = args.cnf_cache
+
+    # SIGTERM thoát như Ctrl+C: đóng socket, dừng các worker
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    with SolverService(args.workers, args.max_pending, args.timeout) as service:
+        try:
+            if args.socket:
+                print(f"Listening on {args.socket}", file=sys.stderr, flush=True)
+                serve_socket(service, args.socket)
+            else:
+                serve_stream(service, sys.stdin, sys.stdout)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+from pysat.solvers import Solver
+from cnf_cache import load_or_generate
+from generator import is_connected, connectivity_cuts, model_edges, bridge_literals
+
+# Phiên giải dùng lâu dài cho giao diện chỉnh sửa puzzle.
+# CNF và solver chỉ được tạo một lần; các cầu người chơi đặt được đưa vào
+# dưới dạng assumptions nên bỏ cầu không cần xóa mệnh đề nào, và các mệnh đề
+# solver đã học (cùng các lát cắt liên thông) được giữ lại giữa các truy vấn.
+class HashiSession:
+    def __init__(self, grid, solver_name='glucose3', options=None):
+        if not grid or not grid[0]:
+            raise ValueError("Empty or invalid grid.")
+        # Người chơi có thể đặt cầu trên mọi cạnh nên mỗi cạnh cần biến: không tiền xử lý
+        self.data = load_or_generate(grid, dict(options or {}, preprocess=False))
+        self.solver = Solver(name=solver_name)
+        self.data['cnf'].add_to(self.solver)
+        self.placed = {}        # (x1, y1, x2, y2) -> số cầu người chơi đặt (0, 1 hoặc 2)
+        self._solution = None
+        self._solved = False
+        self._selectors = set()
+
+    def close(self):
+        self.solver.delete()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _edge(self, x1, y1, x2, y2):
+        edge = (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+        if edge not in self.data['edge_vars']:
+            raise ValueError(f"No bridge can join ({x1}, {y1}) and ({x2}, {y2})")
+        return edge
+
+    # Đặt (hoặc đổi) số cầu giữa hai đảo; weight = 0 nghĩa là chắc chắn không có cầu
+    def place(self, x1, y1, x2, y2, weight):
+        if weight not in (0, 1, 2):
+            raise ValueError("A bridge has weight 0, 1 or 2")
+        self.placed[self._edge(x1, y1, x2, y2)] = weight
+        self._solved = False
+
+    def remove(self, x1, y1, x2, y2):
+        if self.placed.pop(self._edge(x1, y1, x2, y2), None) is not None:
+            self._solved = False
+
+    def _assumptions(self):
+        assumptions = []
+        for edge, weight in self.placed.items():
+            assumptions.extend(bridge_literals(self.data, edge, weight))
+        return assumptions
+
+    # Assumptions loại trừ "cạnh có đúng weight cầu". Với mã hóa ordered, loại
+    # 1 cầu là mệnh đề (-v1 v v2) nên cần một biến chọn gắn với mệnh đề đó.
+    def _exclude(self, edge, weight):
+        v1, v2 = self.data['edge_vars'][edge]
+        if self.data['encoding']['bridges'] == 'pair':
+            return [-(v1 if weight == 1 else v2)]
+        if weight == 2:
+            return [-v2]
+        selector = self.data['vpool'].id(('exclude', edge))
+        if selector not in self._selectors:
+            self._selectors.add(selector)
+            self.solver.add_clause([-selector, -v1, v2])
+        return [selector]
+
+    # Tìm lời giải liên thông thỏa assumptions. Lát cắt đúng với mọi lời giải
+    # liên thông nên được thêm hẳn vào solver.
+    def _solve(self, extra=()):
+        assumptions = self._assumptions() + list(extra)
+        while self.solver.solve(assumptions=assumptions):
+            model = self.solver.get_model()
+            active_edges = model_edges([lit for lit in model if lit > 0], self.data)
+            if is_connected(active_edges, self.data['island_map']):
+                return active_edges
+            cuts = connectivity_cuts(active_edges, self.data['edge_vars'], self.data['island_map'])
+            if any(not cut for cut in cuts):
+                return None
+            for cut in cuts:
+                self.solver.add_clause(cut)
+        return None
+
+    def solution(self):
+        if not self._solved:
+            self._solution = self._solve()
+            self._solved = True
+        return self._solution
+
+    # Trạng thái hiện tại còn hoàn thành được không
+    def is_solvable(self):
+        return self.solution() is not None
+
+    # Cầu (x1, y1, x2, y2, w) có trong mọi lời giải tiếp nối trạng thái hiện tại
+    def forced_bridges(self, limit=None):
+        solution = self.solution()
+        if solution is None:
+            return []
+        forced = []
+        for x1, y1, x2, y2, weight in solution:
+            if (x1, y1, x2, y2) in self.placed:
+                continue
+            if self._solve(self._exclude((x1, y1, x2, y2), weight)) is None:
+                forced.append((x1, y1, x2, y2, weight))
+                if limit is not None and len(forced) >= limit:
+                    break
+        return forced
+
+    def forced_bridge(self):
+        forced = self.forced_bridges(limit=1)
+        return forced[0] if forced else None
+
+    # Gợi ý bước tiếp theo: ưu tiên cầu bắt buộc, nếu không có thì lấy một cầu
+    # của lời giải hiện tại. Trả về None khi không giải được hoặc đã đặt đủ.
+    def next_step(self):
+        forced = self.forced_bridge()
+        if forced is not None:
+            return forced
+        for x1, y1, x2, y2, weight in self.solution() or ():
+            if self.placed.get((x1, y1, x2, y2)) != weight:
+                return (x1, y1, x2, y2, weight)
+        return None
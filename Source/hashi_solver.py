@@ -0,0 +1,220 @@
+from generator import crossing_pairs
+from board import as_board
+from solver_stats import SolverStats, record_iteration
+import time
+
+# Giải trực tiếp trên lưới, không qua CNF.
+# Mỗi cạnh ứng viên e có miền [lo[e], hi[e]] ⊆ {0, 1, 2}. Lan truyền dùng
+# sức chứa còn lại của đảo, loại trừ cạnh cắt nhau và suy luận liên thông;
+# rẽ nhánh trên đảo bị ràng buộc chặt nhất.
+
+def build_problem(grid):
+    board = as_board(grid)
+    islands = list(board.islands)
+    index = {island: i for i, island in enumerate(islands)}
+    edges = list(board.edges())
+    ends = [(index[(a, b)], index[(c, d)]) for a, b, c, d in edges]
+    incident = [[] for _ in islands]
+    for e, (i, j) in enumerate(ends):
+        incident[i].append(e)
+        incident[j].append(e)
+    crossing = [[] for _ in edges]
+    for e, f in crossing_pairs(edges):
+        crossing[e].append(f)
+        crossing[f].append(e)
+    return {
+        'islands': islands,
+        'values': list(board.islands.values()),
+        'edges': edges,
+        'ends': ends,
+        'incident': incident,
+        'crossing': crossing,
+    }
+
+def find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def union(parent, i, j):
+    i, j = find(parent, i), find(parent, j)
+    if i != j:
+        parent[i] = j
+
+# Suy luận liên thông. Trả về None nếu không thể liên thông, ngược lại trả về
+# các cạnh bắt buộc phải có cầu (cạnh duy nhất nối một thành phần ra ngoài).
+def connectivity(problem, lo, hi):
+    n = len(problem['islands'])
+    ends = problem['ends']
+    possible = list(range(n))
+    fixed = list(range(n))
+    for e, (i, j) in enumerate(ends):
+        if hi[e]:
+            union(possible, i, j)
+        if lo[e]:
+            union(fixed, i, j)
+    root = find(possible, 0)
+    if any(find(possible, i) != root for i in range(n)):
+        return None
+    roots = {find(fixed, i) for i in range(n)}
+    if len(roots) == 1:
+        return []
+    outgoing = dict.fromkeys(roots, 0)
+    last = {}
+    for e, (i, j) in enumerate(ends):
+        if not hi[e]:
+            continue
+        ri, rj = find(fixed, i), find(fixed, j)
+        if ri != rj:
+            outgoing[ri] += 1
+            outgoing[rj] += 1
+            last[ri] = last[rj] = e
+    forced = []
+    for r, count in outgoing.items():
+        if count == 0:
+            return None
+        if count == 1 and lo[last[r]] == 0:
+            forced.append(last[r])
+    return forced
+
+# Lan truyền tới điểm bất động, bắt đầu từ các đảo trong queue và (nếu có)
+# quyết định decision = (cạnh, số cầu). Trả về False nếu gặp mâu thuẫn.
+def propagate(problem, lo, hi, queue, decision=None):
+    values, ends, incident, crossing = problem['values'], problem['ends'], problem['incident'], problem['crossing']
+    pending = set(queue)
+    queue = list(pending)
+
+    def tighten(e, new_lo, new_hi):
+        if new_lo <= lo[e] and new_hi >= hi[e]:
+            return True
+        new_lo, new_hi = max(lo[e], new_lo), min(hi[e], new_hi)
+        if new_lo > new_hi:
+            return False
+        if new_lo > 0 and lo[e] == 0:       # Cạnh có cầu: các cạnh cắt nó phải bằng 0
+            for f in crossing[e]:
+                if lo[f] > 0:
+                    return False
+                hi[f] = 0
+                for i in ends[f]:
+                    if i not in pending:
+                        pending.add(i)
+                        queue.append(i)
+        lo[e], hi[e] = new_lo, new_hi
+        for i in ends[e]:
+            if i not in pending:
+                pending.add(i)
+                queue.append(i)
+        return True
+
+    if decision is not None and not tighten(decision[0], decision[1], decision[1]):
+        return False
+    while True:
+        while queue:
+            i = queue.pop()
+            pending.discard(i)
+            total_lo = sum(lo[e] for e in incident[i])
+            total_hi = sum(hi[e] for e in incident[i])
+            value = values[i]
+            if total_lo > value or total_hi < value:
+                return False
+            for e in incident[i]:
+                if not tighten(e, value - (total_hi - hi[e]), value - (total_lo - lo[e])):
+                    return False
+        forced = connectivity(problem, lo, hi)
+        if forced is None:
+            return False
+        if not forced:
+            return True
+        for e in forced:
+            if not tighten(e, 1, 2):
+                return False
+
+# Tiền xử lý cho các solver CNF: lan truyền tới điểm bất động trên lưới, thêm
+# luật cặp 1-1 không nối được và cặp 2-2 không nối cầu đôi (khi có hơn 2 đảo).
+# Trả về {cạnh: (lo, hi)} hoặc None nếu bảng vô nghiệm.
+def bridge_domains(grid):
+    problem = build_problem(grid)
+    n = len(problem['islands'])
+    if n == 0:
+        return {}
+    values = problem['values']
+    lo = bytearray(len(problem['edges']))
+    hi = bytearray([2] * len(problem['edges']))
+    if n > 2:
+        for e, (i, j) in enumerate(problem['ends']):
+            if values[i] == 1 and values[j] == 1:
+                hi[e] = 0
+            elif values[i] == 2 and values[j] == 2:
+                hi[e] = 1
+    if not propagate(problem, lo, hi, range(n)):
+        return None
+    return {edge: (lo[e], hi[e]) for e, edge in enumerate(problem['edges'])}
+
+# Đảo chưa đủ cầu có ít cạnh chưa quyết định nhất
+def choose_edge(problem, lo, hi):
+    best, best_key = None, None
+    for i, edges in enumerate(problem['incident']):
+        open_edges = [e for e in edges if lo[e] != hi[e]]
+        if not open_edges:
+            continue
+        slack = problem['values'][i] - sum(lo[e] for e in edges)
+        key = (len(open_edges), slack)
+        if best_key is None or key < best_key:
+            best, best_key = open_edges[0], key
+            if key[0] == 1:
+                break
+    return best
+
+def solve_problem(problem, stats=None):
+    n_edges = len(problem['edges'])
+    if not problem['islands']:
+        return []
+    lo = bytearray(n_edges)
+    hi = bytearray([2] * n_edges)
+    nodes = 0
+    branches = 0
+    stack_peak = 0
+    stack = []
+    start_time = time.perf_counter()
+    try:
+        if propagate(problem, lo, hi, range(len(problem['islands']))):
+            stack.append((lo, hi))
+        while stack:
+            lo, hi = stack.pop()
+            nodes += 1
+            e = choose_edge(problem, lo, hi)
+            if e is None:       # Mọi cạnh đã quyết định, propagate đã kiểm tra tổng và liên thông
+                return [problem['edges'][e] + (lo[e],) for e in range(n_edges) if lo[e]]
+            # Thử giá trị nhỏ trước (đẩy vào ngăn xếp sau cùng)
+            for value in range(hi[e], lo[e] - 1, -1):
+                branches += 1
+                child_lo, child_hi = bytearray(lo), bytearray(hi)
+                if propagate(problem, child_lo, child_hi, (), (e, value)):
+                    stack.append((child_lo, child_hi))
+            stack_peak = max(stack_peak, len(stack))
+        return None
+    finally:
+        if stats is not None:
+            stats['nodes_expanded'] = stats.get('nodes_expanded', 0) + nodes
+            stats['decisions'] = stats.get('decisions', 0) + branches
+            stats['heap_peak'] = max(stats.get('heap_peak', 0), stack_peak)
+            record_iteration(stats, time.perf_counter() - start_time)
+
+# Không có CNF: variables là số cạnh ứng viên, encode_time là thời gian dựng bài toán
+def solve_hashi(grid, stats=None, verbose=True, return_stats=False):
+    stats = stats if stats is not None else SolverStats('hashi')
+    if not grid or not grid[0]:
+        if verbose:
+            print("Empty or invalid grid.")
+        return (None, stats) if return_stats else None
+    start_time = time.perf_counter()
+    problem = build_problem(grid)
+    stats['variables'] = len(problem['edges'])
+    stats['encode_time'] = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    solution = solve_problem(problem, stats)
+    stats.finish(time.perf_counter() - start_time)
+    if verbose:
+        print(f"[Hashi] Solved in {stats.total_time():.4f} seconds")
+    return (solution, stats) if return_stats else solution
@@ -1,35 +1,56 @@
 import sys
+import argparse
+import json
+import os
 sys.stdout.reconfigure(encoding='utf-8')
-from pySAT_solver import solve_pysat
-from astar_solver import solve_astar
-from backtracking_solver import solve_backtracking
-from brute_force_solver import solve_bruteforce
+from puzzle_io import parse_puzzle, format_solution, is_container
+# Các module solver (pysat, numpy, ...) chỉ được import khi cần, qua batch.load_solver
 
+# Lưới đặc hoặc Board (file định dạng thưa, xem puzzle_io)
 def read_input(filename):
     with open(filename, 'r') as f:
-        lines = [line.strip() for line in f if line.strip()]
-        if not lines:
+        grid = parse_puzzle(f)
+        if not grid:
             print(f"Warning: {filename} is empty or invalid format.")
-            return []
-        return [list(map(int, line.split(','))) for line in lines]
+        return grid
 
 def write_solution(grid, edges, output_file):
-    rows, cols = len(grid), len(grid[0])
-    board = [[str(cell) if cell != 0 else '0' for cell in row] for row in grid]
+    with open(output_file, 'w') as f:
+        f.write(format_solution(grid, edges))
 
-    for x1, y1, x2, y2, w in edges:
-        if x1 == x2:
-            for y in range(min(y1, y2) + 1, max(y1, y2)):
-                board[x1][y] = '=' if w == 2 else '-'
-        elif y1 == y2:
-            for x in range(min(x1, x2) + 1, max(x1, x2)):
-                board[x][y1] = '$' if w == 2 else '|'
+def run_cli(argv):
+    from batch import SOLVERS, run_batch, run_stream
+    parser = argparse.ArgumentParser(description="Solve many Hashiwokakero puzzles in parallel.")
+    parser.add_argument('inputs', help="directory of puzzle files, a glob pattern, or a .jsonl / .jsonl.gz puzzle file")
+    parser.add_argument('-s', '--solver', choices=list(SOLVERS), default='pysat')
+    parser.add_argument('-o', '--output-dir', default=None,
+                        help="output directory (default: Outputs), or the solution file for a .jsonl input "
+                             "(default: <input>.solutions.jsonl)")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="number of worker processes (default: CPU count)")
+    parser.add_argument('-t', '--timeout', type=float, default=None, help="per-puzzle timeout in seconds")
+    parser.add_argument('--summary', default=None, help="JSON-lines summary file")
+    parser.add_argument('--cnf-cache', default=None, help="directory for the on-disk CNF cache")
+    args = parser.parse_args(argv)
+    if args.cnf_cache:
+        os.environ['HASHI_CNF_CACHE'] = args.cnf_cache
 
-    with open(output_file, 'w') as f:
-        for row in board:
-            f.write('[ ' + ' , '.join(f'"{cell}"' for cell in row) + ' ]\n')
+    if is_container(args.inputs):
+        suffix = args.inputs.rindex('.jsonl')
+        output = args.output_dir or args.inputs[:suffix] + '.solutions' + args.inputs[suffix:]
+        records = run_stream(args.inputs, args.solver, output, args.workers, args.timeout, args.summary)
+    else:
+        records = run_batch(args.inputs, args.solver, args.output_dir or 'Outputs', args.workers,
+                            args.timeout, args.summary)
+    failed = 0
+    for record in records:
+        print(json.dumps(record), flush=True)
+        failed += record['status'] in ('error', 'timeout')
+    return 1 if failed else 0
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+
     print("=== Hashiwokakero Solver ===")
     print("Welcome to the Hashiwokakero puzzle solver!")
     
@@ -60,22 +81,24 @@ if __name__ == '__main__':
         print("2. Brute Force")
         print("3. Backtracking")
         print("4. A*")
-        print("5. Exit")
+        print("5. Hashi (native)")
+        print("6. Portfolio (parallel)")
+        print("7. Exit")
         
         try:
-            method_choice = input("Please select a solving method (1-5): ").strip()
+            method_choice = input("Please select a solving method (1-7): ").strip()
             
-            if method_choice == '5':
+            if method_choice == '7':
                 print("Goodbye!")
                 break
                 
             method_num = int(method_choice)
-            if method_num < 1 or method_num > 4:
-                print("Invalid choice! Please enter a number between 1 and 4.")
+            if method_num < 1 or method_num > 6:
+                print("Invalid choice! Please enter a number between 1 and 6.")
                 continue
                 
         except ValueError:
-            print("Invalid input! Please enter a valid number between 1 and 4.")
+            print("Invalid input! Please enter a valid number between 1 and 6.")
             continue
         
         # Process the selected input and method
@@ -83,7 +106,7 @@ if __name__ == '__main__':
         output_file = f"Outputs/output-{input_num:02}.txt"
         
         print(f"\nProcessing input file: {input_file}")
-        print(f"Using method: {['pySAT', 'Brute Force', 'Backtracking', 'A*'][method_num-1]}")
+        print(f"Using method: {['pySAT', 'Brute Force', 'Backtracking', 'A*', 'Hashi', 'Portfolio'][method_num-1]}")
         
         grid = read_input(input_file)
         if not grid:
@@ -93,15 +116,9 @@ if __name__ == '__main__':
             continue
         
         # Solve using selected method
-        edges = None
-        if method_num == 1:
-            edges = solve_pysat(grid)
-        elif method_num == 2:
-            edges = solve_bruteforce(grid)
-        elif method_num == 3:
-            edges = solve_backtracking(grid)
-        elif method_num == 4:
-            edges = solve_astar(grid)
+        from batch import load_solver
+        solver_name = ['pysat', 'bruteforce', 'backtracking', 'astar', 'hashi', 'portfolio'][method_num-1]
+        edges = load_solver(solver_name)(grid)
         
         if edges is not None:
             write_solution(grid, edges, output_file)
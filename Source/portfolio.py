@@ -0,0 +1,102 @@
+import json
+import os
+import time
+from collections import defaultdict
+from batch import SOLVERS, export_stats, load_solver, run_pool
+from generator import check_solution
+from board import as_board
+from solver_stats import SolverStats
+
+# Chạy nhiều solver (hoặc nhiều backend pysat) song song trên cùng một lưới,
+# mỗi cấu hình một tiến trình. Lời giải liên thông đã kiểm tra đầu tiên thắng,
+# các tiến trình còn lại bị hủy. Một cấu hình là "solver" hoặc "solver:backend",
+# backend chỉ dùng cho pysat (glucose3, cadical153, minisat22, ...).
+DEFAULT_PORTFOLIO = ('pysat:glucose3', 'pysat:cadical153', 'pysat:minisat22', 'hashi', 'backtracking')
+
+# Các solver duyệt hết không gian tìm kiếm: 'unsolved' của chúng chứng minh bảng
+# vô nghiệm. astar chỉ đầy đủ khi không giới hạn max_nodes, mà cấu hình portfolio
+# không truyền được max_nodes. Solver thêm vào SOLVERS mà không có ở đây
+# (heuristic, có giới hạn) thì 'unsolved' của nó không kết thúc portfolio.
+COMPLETE_SOLVERS = ('pysat', 'bruteforce', 'backtracking', 'cdcl', 'astar', 'hashi')
+
+def parse_entry(entry):
+    solver_name, _, backend = entry.partition(':')
+    if solver_name not in SOLVERS or solver_name == 'portfolio':
+        raise ValueError(f"Unknown solver '{solver_name}', expected one of {', '.join(SOLVERS)}")
+    if backend and solver_name != 'pysat':
+        raise ValueError(f"Only pysat takes a backend: '{entry}'")
+    return solver_name, backend
+
+def solve_entry(grid, entry):
+    solver_name, backend = parse_entry(entry)
+    solve = load_solver(solver_name)
+    stats = SolverStats(entry)
+    if backend:
+        edges = solve(grid, backend=backend, stats=stats, verbose=False)
+    else:
+        edges = solve(grid, stats=stats, verbose=False)
+    return {'status': 'solved' if edges is not None else 'unsolved', 'edges': edges,
+            'solve_time': round(stats.total_time(), 6), 'stats': export_stats(stats)}
+
+# Trả về lời giải của cấu hình về trước. Kết quả 'unsolved' chỉ là câu trả lời
+# cuối cùng khi đến từ một solver trong COMPLETE_SOLVERS; của cấu hình khác thì
+# chờ các cấu hình còn lại. stats nhận thống kê của cấu hình thắng,
+# 'winner' và kết quả của từng cấu hình đã xong; log là file JSON-lines để thống
+# kê cấu hình thắng theo kích thước.
+def solve_portfolio(grid, entries=DEFAULT_PORTFOLIO, timeout=None, stats=None, log=None, verbose=True,
+                    return_stats=False):
+    stats = stats if stats is not None else SolverStats('portfolio')
+    if not grid or not grid[0]:
+        if verbose:
+            print("Empty or invalid grid.")
+        return (None, stats) if return_stats else None
+    for entry in entries:
+        parse_entry(entry)
+    start_time = time.perf_counter()
+    results = {}
+    winner, solution = None, None
+    tasks = [(entry, (grid, entry)) for entry in entries]
+    pool = run_pool(tasks, solve_entry, workers=len(tasks), timeout=timeout)
+    try:
+        for entry, record in pool:
+            edges = record.pop('edges', None)
+            if record['status'] == 'solved' and not check_solution(grid, edges):
+                record['status'] = 'invalid'
+            results[entry] = record
+            if record['status'] == 'solved' or \
+                    record['status'] == 'unsolved' and parse_entry(entry)[0] in COMPLETE_SOLVERS:
+                winner, solution = entry, edges
+                break
+    finally:
+        pool.close()        # Kill các tiến trình còn đang chạy
+    elapsed = time.perf_counter() - start_time
+
+    if winner is not None:
+        stats.update(results[winner]['stats'])
+    stats['winner'] = winner
+    stats['results'] = results
+    stats['elapsed'] = elapsed
+    stats['solve_time'] = elapsed - stats.get('encode_time', 0.0)
+    log = log or os.environ.get('HASHI_PORTFOLIO_LOG')
+    if log and winner is not None:
+        record = {'rows': len(grid), 'cols': len(grid[0]),
+                  'islands': len(as_board(grid).islands),
+                  'winner': winner, 'status': results[winner]['status'],
+                  'time': round(elapsed, 6), 'entries': list(entries)}
+        with open(log, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+    if verbose and solution is not None:
+        print(f"[Portfolio] Solved in {elapsed:.4f} seconds (winner: {winner})")
+    return (solution, stats) if return_stats else solution
+
+# Đếm số lần thắng của từng cấu hình theo nhóm kích thước (cạnh dài nhất làm tròn lên bội của bucket)
+def routing_stats(log, bucket=10):
+    wins = defaultdict(lambda: defaultdict(int))
+    with open(log) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            side = -(-max(record['rows'], record['cols']) // bucket) * bucket
+            wins[side][record['winner']] += 1
+    return {f"<={side}x{side}": dict(wins[side]) for side in sorted(wins)}
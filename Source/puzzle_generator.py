@@ -0,0 +1,172 @@
+import sys
+import argparse
+import os
+import random
+import time
+from multiprocessing import Pool
+from puzzle_io import format_puzzle, is_container, write_puzzles
+from board import Board
+
+# Hướng (dx, dy); hướng ngược lại của d là d ^ 1
+DIRECTIONS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+EMPTY, ISLAND, BRIDGE = 0, 1, 2
+
+# Sinh một bảng Hashiwokakero có lời giải.
+# Bắt đầu từ một đảo, nối dần đảo mới vào đảo có sẵn bằng cầu không cắt nhau
+# (cây khung ngẫu nhiên), sau đó thêm cầu giữa các đảo nhìn thấy nhau với xác
+# suất bridge_density để tạo chu trình. Số của mỗi đảo là tổng số cầu.
+# Trả về (grid, edges) với edges theo định dạng (x1, y1, x2, y2, w) của solver;
+# sparse=True trả về Board thay cho lưới đặc.
+def generate_puzzle(rows, cols=None, island_density=0.1, bridge_density=0.2,
+                    double_ratio=0.5, max_length=None, seed=None, sparse=False):
+    cols = cols or rows
+    rng = random.Random(seed)
+    max_length = max_length or max(2, min(rows, cols) // 3)
+    cells = bytearray(rows * cols)
+    used_dirs = {}      # đảo -> bitmask các hướng đã có cầu
+    values = {}
+    edges = []
+
+    def add_bridge(x, y, d, length, nx, ny):
+        dx, dy = DIRECTIONS[d]
+        for k in range(1, length):
+            cells[(x + dx * k) * cols + y + dy * k] = BRIDGE
+        weight = 2 if rng.random() < double_ratio else 1
+        used_dirs[(x, y)] |= 1 << d
+        used_dirs[(nx, ny)] |= 1 << (d ^ 1)
+        values[(x, y)] += weight
+        values[(nx, ny)] += weight
+        edges.append((min(x, nx), min(y, ny), max(x, nx), max(y, ny), weight))
+
+    x, y = rng.randrange(rows), rng.randrange(cols)
+    cells[x * cols + y] = ISLAND
+    islands = [(x, y)]
+    used_dirs[(x, y)] = 0
+    values[(x, y)] = 0
+
+    target = max(2, int(rows * cols * island_density))
+    attempts = 0
+    while len(islands) < target and attempts < target * 30:
+        attempts += 1
+        x, y = islands[rng.randrange(len(islands))]
+        d = rng.randrange(4)
+        if used_dirs[(x, y)] >> d & 1:
+            continue
+        dx, dy = DIRECTIONS[d]
+        length = rng.randint(2, max_length)
+        nx, ny = x + dx * length, y + dy * length
+        if not (0 <= nx < rows and 0 <= ny < cols) or cells[nx * cols + ny] != EMPTY:
+            continue
+        if any(cells[(x + dx * k) * cols + y + dy * k] for k in range(1, length)):
+            continue
+        cells[nx * cols + ny] = ISLAND
+        islands.append((nx, ny))
+        used_dirs[(nx, ny)] = 0
+        values[(nx, ny)] = 0
+        add_bridge(x, y, d, length, nx, ny)
+
+    # Thêm cầu giữa các đảo nhìn thấy nhau (sang phải / xuống dưới)
+    if bridge_density > 0 and len(islands) > 2:
+        order = islands[:]
+        rng.shuffle(order)
+        for x, y in order:
+            for d in (0, 2):
+                if used_dirs[(x, y)] >> d & 1 or rng.random() >= bridge_density:
+                    continue
+                dx, dy = DIRECTIONS[d]
+                nx, ny, length = x + dx, y + dy, 1
+                while 0 <= nx < rows and 0 <= ny < cols and cells[nx * cols + ny] == EMPTY:
+                    nx, ny, length = nx + dx, ny + dy, length + 1
+                if not (0 <= nx < rows and 0 <= ny < cols) or cells[nx * cols + ny] != ISLAND:
+                    continue
+                if used_dirs[(nx, ny)] >> (d ^ 1) & 1:
+                    continue
+                add_bridge(x, y, d, length, nx, ny)
+
+    if sparse:
+        return Board(rows, cols, values), edges
+    grid = [[0] * cols for _ in range(rows)]
+    for (x, y), value in values.items():
+        grid[x][y] = value
+    return grid, edges
+
+def generate_board(rows, cols=None, island_density=0.1, bridge_density=0.2,
+                   double_ratio=0.5, max_length=None, seed=None, sparse=False):
+    return generate_puzzle(rows, cols, island_density, bridge_density, double_ratio, max_length, seed, sparse)[0]
+
+# Kiểm tra bảng có đúng một lời giải liên thông
+def is_unique(grid):
+    from pySAT_solver import count_solutions
+    return count_solutions(grid, limit=2) == 1
+
+def write_puzzle(grid, filename):
+    with open(filename, 'w') as f:
+        f.write(format_puzzle(grid))
+
+def _generate_one(args):
+    index, rows, cols, island_density, bridge_density, double_ratio, seed, unique, max_tries, sparse = args
+    for attempt in range(max_tries):
+        grid = generate_board(rows, cols, island_density, bridge_density, double_ratio,
+                              seed=f"{seed}-{index}-{attempt}", sparse=sparse)
+        if not unique or is_unique(grid):
+            return index, grid
+    return index, None
+
+# Sinh count bảng với seed tái lập được: bảng thứ i chỉ phụ thuộc (seed, i).
+# Với unique=True, bảng có nhiều lời giải bị sinh lại (tối đa max_tries lần).
+def generate_corpus(count, rows, cols=None, island_density=0.1, bridge_density=0.2,
+                    double_ratio=0.5, seed=0, unique=False, max_tries=20, workers=1, sparse=False):
+    cols = cols or rows
+    tasks = [(i, rows, cols, island_density, bridge_density, double_ratio, seed, unique, max_tries, sparse)
+             for i in range(count)]
+    if workers == 1:
+        yield from map(_generate_one, tasks)
+        return
+    with Pool(workers) as pool:
+        yield from pool.imap(_generate_one, tasks, chunksize=max(1, count // (workers * 8)))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate random Hashiwokakero puzzles.")
+    parser.add_argument('size', type=int, help="number of rows (and columns unless --cols is given)")
+    parser.add_argument('--cols', type=int, default=None)
+    parser.add_argument('-n', '--count', type=int, default=1)
+    parser.add_argument('--island-density', type=float, default=0.1, help="fraction of cells that are islands")
+    parser.add_argument('--bridge-density', type=float, default=0.2,
+                        help="probability of adding an extra bridge between visible islands")
+    parser.add_argument('--double-ratio', type=float, default=0.5, help="probability that a bridge is double")
+    parser.add_argument('--seed', default='0')
+    parser.add_argument('--unique', action='store_true', help="only keep puzzles with exactly one solution")
+    parser.add_argument('-j', '--workers', type=int, default=1)
+    parser.add_argument('--sparse', action='store_true',
+                        help="write the sparse island-list format (for large boards with few islands)")
+    parser.add_argument('-o', '--output-dir', default='Generated',
+                        help="directory for input-XX.txt files, or a .jsonl / .jsonl.gz puzzle file")
+    args = parser.parse_args(argv)
+
+    start_time = time.perf_counter()
+    width = max(2, len(str(args.count)))
+    boards = generate_corpus(args.count, args.size, args.cols, args.island_density,
+                             args.bridge_density, args.double_ratio, args.seed,
+                             args.unique, workers=args.workers, sparse=args.sparse)
+
+    def puzzles():
+        for index, grid in boards:
+            if grid is None:
+                print(f"Puzzle {index + 1}: no unique board found", file=sys.stderr)
+                continue
+            yield f"input-{index + 1:0{width}}", grid
+
+    if is_container(args.output_dir):
+        written = write_puzzles(args.output_dir, puzzles())
+    else:
+        os.makedirs(args.output_dir, exist_ok=True)
+        written = 0
+        for puzzle_id, grid in puzzles():
+            write_puzzle(grid, os.path.join(args.output_dir, puzzle_id + '.txt'))
+            written += 1
+    elapsed = time.perf_counter() - start_time
+    print(f"Generated {written} puzzles in {elapsed:.2f} seconds")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
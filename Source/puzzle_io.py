@@ -0,0 +1,256 @@
+import argparse
+import glob
+import gzip
+import json
+import os
+import sys
+from board import Board
+
+# Định dạng nhiều puzzle / lời giải trong một file: JSON-lines, mỗi dòng một bản ghi
+#   puzzle:   {"id": "input-01", "grid": [[4, 0, 0, 3], ...]}
+#   puzzle thưa: {"id": "big-01", "rows": 1000, "cols": 1000, "islands": [[x, y, value], ...]}
+#   lời giải: {"id": "input-01", "status": "solved", "edges": [[x1, y1, x2, y2, w], ...]}
+# Tên file kết thúc bằng .gz thì được nén gzip. Đọc và ghi đều theo luồng
+# (generator) nên bộ nhớ không tăng theo số puzzle trong file.
+CONTAINER_SUFFIXES = ('.jsonl', '.jsonl.gz')
+
+def is_container(path):
+    return path.endswith(CONTAINER_SUFFIXES)
+
+def open_stream(path, mode='r'):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def read_records(path):
+    with open_stream(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def write_records(path, records):
+    count = 0
+    with open_stream(path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(',', ':')) + '\n')
+            count += 1
+    return count
+
+def puzzle_record(puzzle_id, grid):
+    if isinstance(grid, Board):
+        return {'id': puzzle_id, 'rows': grid.rows, 'cols': grid.cols,
+                'islands': [[x, y, value] for (x, y), value in grid.islands.items()]}
+    return {'id': puzzle_id, 'grid': grid}
+
+# Bản ghi thưa được đọc thành Board, bản ghi "grid" thành lưới đặc
+def read_puzzles(path):
+    for record in read_records(path):
+        if 'islands' in record:
+            yield record['id'], Board(record['rows'], record['cols'],
+                                      {(x, y): value for x, y, value in record['islands']})
+        else:
+            yield record['id'], record['grid']
+
+def write_puzzles(path, puzzles):
+    return write_records(path, (puzzle_record(puzzle_id, grid) for puzzle_id, grid in puzzles))
+
+def solution_record(puzzle_id, edges, status=None):
+    if status is None:
+        status = 'solved' if edges is not None else 'unsolved'
+    return {'id': puzzle_id, 'status': status,
+            'edges': [list(edge) for edge in edges] if edges is not None else None}
+
+def read_solutions(path):
+    for record in read_records(path):
+        edges = record.get('edges')
+        yield record['id'], [tuple(edge) for edge in edges] if edges is not None else None
+
+def write_solutions(path, solutions):
+    return write_records(path, (solution_record(puzzle_id, edges) for puzzle_id, edges in solutions))
+
+# --- Định dạng một puzzle mỗi file (input-XX.txt / output-XX.txt) ---
+# Lưới đặc: mỗi dòng một hàng, các ô cách nhau bởi dấu phẩy. Bảng thưa cho
+# bảng lớn ít đảo: dòng đầu "sparse <rows> <cols>", sau đó mỗi dòng một đảo
+# "x, y, value". Lời giải của bảng thưa là "sparse <rows> <cols>" và mỗi dòng
+# một cầu "x1, y1, x2, y2, w".
+SPARSE_HEADER = 'sparse'
+
+def parse_grid(lines):
+    lines = [line.strip() for line in lines if line.strip()]
+    return [list(map(int, line.split(','))) for line in lines]
+
+def format_grid(grid):
+    return '\n'.join(', '.join(str(cell) for cell in row) for row in grid) + '\n'
+
+def _sparse_header(line):
+    words = line.split()
+    if len(words) != 3 or words[0] != SPARSE_HEADER:
+        return None
+    return int(words[1]), int(words[2])
+
+def parse_board(lines):
+    lines = [line.strip() for line in lines if line.strip()]
+    if not lines or _sparse_header(lines[0]) is None:
+        return None
+    rows, cols = _sparse_header(lines[0])
+    islands = {}
+    for line in lines[1:]:
+        x, y, value = map(int, line.split(','))
+        islands[(x, y)] = value
+    return Board(rows, cols, islands)
+
+def format_board(board):
+    lines = [f"{SPARSE_HEADER} {board.rows} {board.cols}"]
+    lines.extend(f"{x}, {y}, {value}" for (x, y), value in board.islands.items())
+    return '\n'.join(lines) + '\n'
+
+# Đọc một file puzzle ở định dạng đặc hoặc thưa
+def parse_puzzle(lines):
+    lines = [line for line in lines if line.strip()]
+    if lines and _sparse_header(lines[0]) is not None:
+        return parse_board(lines)
+    return parse_grid(lines)
+
+def format_puzzle(grid):
+    return format_board(grid) if isinstance(grid, Board) else format_grid(grid)
+
+# Hiển thị lời giải dạng lưới: '-' / '=' cầu ngang đơn / đôi, '|' / '$' cầu dọc.
+# Bảng thưa được ghi thành danh sách cầu, không dựng lưới đặc.
+def format_solution(grid, edges):
+    if isinstance(grid, Board):
+        lines = [f"{SPARSE_HEADER} {grid.rows} {grid.cols}"]
+        lines.extend(', '.join(map(str, edge)) for edge in edges)
+        return '\n'.join(lines) + '\n'
+    board = [[str(cell) for cell in row] for row in grid]
+    for x1, y1, x2, y2, w in edges:
+        if x1 == x2:
+            for y in range(min(y1, y2) + 1, max(y1, y2)):
+                board[x1][y] = '=' if w == 2 else '-'
+        elif y1 == y2:
+            for x in range(min(x1, x2) + 1, max(x1, x2)):
+                board[x][y1] = '$' if w == 2 else '|'
+    return ''.join('[ ' + ' , '.join(f'"{cell}"' for cell in row) + ' ]\n' for row in board)
+
+# Đọc ngược lưới lời giải thành (grid, edges); file không có lời giải -> (None, None).
+# Với lời giải thưa, giá trị mỗi đảo là tổng số cầu của nó và grid là Board.
+def parse_solution(lines):
+    lines = [line for line in lines if line.strip()]
+    if lines and _sparse_header(lines[0]) is not None:
+        rows, cols = _sparse_header(lines[0])
+        edges = [tuple(map(int, line.split(','))) for line in lines[1:]]
+        totals = {}
+        for x1, y1, x2, y2, w in edges:
+            totals[(x1, y1)] = totals.get((x1, y1), 0) + w
+            totals[(x2, y2)] = totals.get((x2, y2), 0) + w
+        return Board(rows, cols, totals), edges
+    board = [json.loads(line) for line in lines if line.strip().startswith('[')]
+    if not board:
+        return None, None
+    grid = [[int(cell) if cell.isdigit() else 0 for cell in row] for row in board]
+    edges = []
+    rows, cols = len(board), len(board[0])
+    for x in range(rows):
+        for y in range(cols):
+            if not grid[x][y]:
+                continue
+            if y + 1 < cols and board[x][y + 1] in '-=':
+                dy = y + 1
+                while board[x][dy] in '-=':
+                    dy += 1
+                edges.append((x, y, x, dy, 2 if board[x][y + 1] == '=' else 1))
+            if x + 1 < rows and board[x + 1][y] in '|$':
+                dx = x + 1
+                while board[dx][y] in '|$':
+                    dx += 1
+                edges.append((x, y, dx, y, 2 if board[x + 1][y] == '$' else 1))
+    return grid, edges
+
+# --- Chuyển đổi giữa hai định dạng ---
+
+def _files(pattern):
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.txt')
+    return sorted(p for p in glob.glob(pattern) if os.path.isfile(p))
+
+def _file_id(filename):
+    return os.path.splitext(os.path.basename(filename))[0]
+
+def pack_inputs(pattern, path):
+    def puzzles():
+        for filename in _files(pattern):
+            with open(filename) as f:
+                yield _file_id(filename), parse_puzzle(f)
+    return write_puzzles(path, puzzles())
+
+def unpack_puzzles(path, directory):
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for puzzle_id, grid in read_puzzles(path):
+        with open(os.path.join(directory, puzzle_id + '.txt'), 'w') as f:
+            f.write(format_puzzle(grid))
+        count += 1
+    return count
+
+# output-XX.txt -> bản ghi lời giải của puzzle input-XX
+def pack_outputs(pattern, path):
+    def solutions():
+        for filename in _files(pattern):
+            with open(filename) as f:
+                _, edges = parse_solution(f)
+            yield _file_id(filename).replace('output', 'input', 1), edges
+    return write_solutions(path, solutions())
+
+# Cần file puzzle để có giá trị đảo. Lời giải thường cùng thứ tự với puzzle;
+# lời giải đến sớm (ví dụ do giải song song) được giữ tạm tới khi gặp puzzle của nó.
+def unpack_solutions(solutions_path, puzzles_path, directory):
+    os.makedirs(directory, exist_ok=True)
+    solutions = read_solutions(solutions_path)
+    waiting = {}
+    count = 0
+    for puzzle_id, grid in read_puzzles(puzzles_path):
+        while puzzle_id not in waiting:
+            solution = next(solutions, None)
+            if solution is None:
+                break
+            waiting[solution[0]] = solution[1]
+        if puzzle_id not in waiting:
+            continue
+        edges = waiting.pop(puzzle_id)
+        name = puzzle_id.replace('input', 'output', 1) + '.txt'
+        with open(os.path.join(directory, name), 'w') as f:
+            f.write(format_solution(grid, edges) if edges is not None else "No solution found\n")
+        count += 1
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert between input-XX.txt/output-XX.txt files and "
+                                                 "multi-puzzle JSON-lines files (.jsonl or .jsonl.gz).")
+    commands = parser.add_subparsers(dest='command', required=True)
+    command = commands.add_parser('pack-inputs', help="input-XX.txt files -> puzzle file")
+    command.add_argument('inputs', help="directory or glob pattern")
+    command.add_argument('output')
+    command = commands.add_parser('unpack-puzzles', help="puzzle file -> input-XX.txt files")
+    command.add_argument('puzzles')
+    command.add_argument('directory')
+    command = commands.add_parser('pack-outputs', help="output-XX.txt files -> solution file")
+    command.add_argument('outputs', help="directory or glob pattern")
+    command.add_argument('output')
+    command = commands.add_parser('unpack-solutions', help="solution file -> output-XX.txt files")
+    command.add_argument('solutions')
+    command.add_argument('puzzles')
+    command.add_argument('directory')
+    args = parser.parse_args(argv)
+
+    if args.command == 'pack-inputs':
+        count = pack_inputs(args.inputs, args.output)
+    elif args.command == 'unpack-puzzles':
+        count = unpack_puzzles(args.puzzles, args.directory)
+    elif args.command == 'pack-outputs':
+        count = pack_outputs(args.outputs, args.output)
+    else:
+        count = unpack_solutions(args.solutions, args.puzzles, args.directory)
+    print(f"Converted {count} records")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,36 +1,106 @@
 from pysat.solvers import Solver
-from generator import generateCNF, is_connected
+from cnf_cache import load_or_generate
+from generator import is_connected, connectivity_cuts, model_edges
+from solver_stats import SolverStats, record_iteration
 import time
 
-def solve_pysat(grid):
-    start_time = time.perf_counter()
-    if not grid or not grid[0]:
-        print("Empty or invalid grid.")
-        return None
+def solve_cnf_pysat(data, mode='cut', stats=None, backend='glucose3'):
+    solver = Solver(name=backend)
+    data['cnf'].add_to(solver)
 
-    data = generateCNF(grid)
-    cnf = data['cnf']
-    solver = Solver(name='glucose3')
-    for clause in cnf:
-        solver.add_clause(clause)
+    try:
+        while True:
+            iteration_start = time.perf_counter()
+            satisfiable = solver.solve()
+            elapsed = time.perf_counter() - iteration_start
+            if not satisfiable:
+                record_iteration(stats, elapsed, satisfiable=False)
+                return None
+            model = solver.get_model()
+            true_vars = [lit for lit in model if lit > 0 and lit in data['reverse_map']]
+            active_edges = model_edges(true_vars, data)
+            blocking_clause = [-var for var in true_vars]
 
-    while solver.solve():
-        model = solver.get_model()
-        active_edges = []
-        blocking_clause = []
+            if is_connected(active_edges, data['island_map']):
+                record_iteration(stats, elapsed, satisfiable=True, connected=True)
+                return active_edges
+            elif mode == 'cut':
+                cuts = connectivity_cuts(active_edges, data['edge_vars'], data['island_map'])
+                record_iteration(stats, elapsed, satisfiable=True, connected=False, cuts=len(cuts))
+                if any(not cut for cut in cuts):     # Có thành phần không thể nối ra ngoài
+                    return None
+                for cut in cuts:
+                    solver.add_clause(cut)
+            else:
+                record_iteration(stats, elapsed, satisfiable=True, connected=False, cuts=0)
+                solver.add_clause(blocking_clause)
+    finally:
+        if stats is not None:
+            counters = solver.accum_stats() or {}
+            stats['decisions'] = stats.get('decisions', 0) + counters.get('decisions', 0)
+            stats['propagations'] = stats.get('propagations', 0) + counters.get('propagations', 0)
+        solver.delete()
 
-        for lit in model:
-            if lit > 0 and lit in data['reverse_map']:
-                edge = data['reverse_map'][lit]
-                active_edges.append(edge)
-                blocking_clause.append(-lit)
+def solve_pysat(grid, mode='cut', backend='glucose3', stats=None, verbose=True, return_stats=False):
+    stats = stats if stats is not None else SolverStats('pysat')
+    if not grid or not grid[0]:
+        if verbose:
+            print("Empty or invalid grid.")
+        return (None, stats) if return_stats else None
+    data = load_or_generate(grid)
+    stats.set_cnf(data)
+    start_time = time.perf_counter()
+    solution = solve_cnf_pysat(data, mode, stats, backend)
+    stats.finish(time.perf_counter() - start_time)
+    if verbose and solution is not None:
+        print(f"[PySAT] Solved in {stats.total_time():.4f} seconds ({stats['iterations']} iterations)")
+    return (solution, stats) if return_stats else solution
 
-        if is_connected(active_edges, data['island_map']):
-            end_time = time.perf_counter()
-            elapsed = end_time - start_time
-            print(f"[PySAT] Solved in {elapsed:.4f} seconds")
-            return active_edges
-        else:
-            solver.add_clause(blocking_clause)
+# Liệt kê các lời giải liên thông, mỗi lời giải một lần. Lời giải tìm được bị
+# chặn bằng mệnh đề chỉ trên các biến cầu (reverse_map), không trên biến phụ của
+# CardEnc, nên các mô hình chỉ khác nhau ở biến phụ không bị liệt kê lại. Mô
+# hình chưa liên thông bị loại bằng lát cắt liên thông, đúng với mọi lời giải
+# liên thông nên không làm mất lời giải nào.
+def enumerate_solutions(grid, limit=None, backend='glucose3', stats=None, options=None):
+    if not grid or not grid[0]:
+        raise ValueError("Empty or invalid grid.")
+    data = load_or_generate(grid, options)
+    if not data['island_map']:
+        yield []
+        return
+    bridge_vars = sorted(data['reverse_map'])
+    found = 0
+    solver = Solver(name=backend)
+    data['cnf'].add_to(solver)
+    try:
+        while limit is None or found < limit:
+            iteration_start = time.perf_counter()
+            satisfiable = solver.solve()
+            elapsed = time.perf_counter() - iteration_start
+            if not satisfiable:
+                record_iteration(stats, elapsed, satisfiable=False)
+                return
+            model = solver.get_model()
+            active_edges = model_edges([var for var in bridge_vars if model[var - 1] > 0], data)
+            if is_connected(active_edges, data['island_map']):
+                record_iteration(stats, elapsed, satisfiable=True, connected=True)
+                found += 1
+                yield active_edges
+                solver.add_clause([-model[var - 1] for var in bridge_vars])
+            else:
+                cuts = connectivity_cuts(active_edges, data['edge_vars'], data['island_map'])
+                record_iteration(stats, elapsed, satisfiable=True, connected=False, cuts=len(cuts))
+                if any(not cut for cut in cuts):
+                    return
+                for cut in cuts:
+                    solver.add_clause(cut)
+    finally:
+        if stats is not None:
+            counters = solver.accum_stats() or {}
+            stats['decisions'] = stats.get('decisions', 0) + counters.get('decisions', 0)
+            stats['propagations'] = stats.get('propagations', 0) + counters.get('propagations', 0)
+        solver.delete()
 
-    return None
\ No newline at end of file
+# Đếm lời giải, dừng sớm khi đủ limit (limit=2 đủ để kiểm tra tính duy nhất)
+def count_solutions(grid, limit=2, backend='glucose3', stats=None, options=None):
+    return sum(1 for _ in enumerate_solutions(grid, limit, backend, stats, options))
@@ -0,0 +1,77 @@
+import sys
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+# Thống kê có cấu trúc cho các solver, thay cho dòng print thời gian.
+# SolverStats là một dict nên các hàm solve_cnf_* vẫn ghi bằng stats['...'] như
+# trước; thêm vào đó là các hook gọi sau mỗi lần lặp liên thông, dùng để gắn
+# profiler / exporter từ bên ngoài mà không sửa module solver.
+# Các hàm solve_* nhận return_stats=True để trả về (lời giải, stats) thay vì chỉ
+# lời giải; khi không truyền stats vào thì stats là một SolverStats mới.
+
+_hooks = []     # Hook toàn cục, gọi cho mọi SolverStats
+
+def add_hook(hook):
+    _hooks.append(hook)
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+def peak_memory_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+class SolverStats(dict):
+    def __init__(self, solver=None, hooks=()):
+        super().__init__(
+            solver=solver,
+            variables=None,         # Số biến / mệnh đề của CNF lúc mã hóa xong
+            clauses=None,
+            fixed_edges=0,          # Số cạnh đã quyết định bởi tiền xử lý (không có biến)
+            encode_time=0.0,
+            solve_time=0.0,
+            iterations=0,           # Số lần giải lại vì lời giải chưa liên thông
+            iteration_times=[],
+            decisions=0,
+            propagations=0,         # Số literal được gán bởi lan truyền
+            nodes_expanded=0,
+            heap_peak=0,
+            peak_memory_kb=None,
+        )
+        self.hooks = list(hooks)
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    # Lấy kích thước và thời gian mã hóa từ kết quả generateCNF / cache
+    def set_cnf(self, data):
+        self['variables'] = data['stats']['variables']
+        self['clauses'] = data['stats']['clauses']
+        self['fixed_edges'] = data['stats'].get('fixed_edges', 0)
+        self['encode_time'] = data['stats']['encode_time']
+
+    def finish(self, solve_time):
+        self['solve_time'] = solve_time
+        self['peak_memory_kb'] = peak_memory_kb()
+
+    def total_time(self):
+        return self['encode_time'] + self['solve_time']
+
+# Ghi một lần lặp vào stats (dict hoặc SolverStats) và gọi các hook với
+# (stats, info), info gồm số thứ tự, thời gian lần lặp và các thông tin thêm.
+def record_iteration(stats, elapsed, **info):
+    if stats is None:
+        return
+    stats['iterations'] = stats.get('iterations', 0) + 1
+    stats.setdefault('iteration_times', []).append(elapsed)
+    hooks = getattr(stats, 'hooks', [])
+    if hooks or _hooks:
+        info['iteration'] = stats['iterations']
+        info['time'] = elapsed
+        for hook in hooks + _hooks:
+            hook(stats, info)